@@ -1,8 +1,14 @@
+import heapq
+
+
 class AVLTree(object):
     class Node(object):
+        __slots__ = ('val', 'height', 'size', 'right', 'left')
+
         def __init__(self, val):
             self.val = val
             self.height = 0
+            self.size = 1
             self.right = None
             self.left = None
 
@@ -13,20 +19,35 @@ class AVLTree(object):
         def set_height(self):
             self.height = max(AVLTree._height(self.left), AVLTree._height(self.right)) + 1
 
+        def set_size(self):
+            self.size = AVLTree._size(self.left) + AVLTree._size(self.right) + 1
+
+        def update(self):
+            self.set_height()
+            self.set_size()
+
+        def copy(self):
+            node = self.__class__(self.val)
+            node.height = self.height
+            node.size = self.size
+            node.right = self.right
+            node.left = self.left
+            return node
+
         def rotate_left(self):
             new_root = self.right
             self.right = new_root.left
             new_root.left = self
-            self.set_height()
-            new_root.set_height()
+            self.update()
+            new_root.update()
             return new_root
 
         def rotate_right(self):
             new_root = self.left
             self.left = new_root.right
             new_root.right = self
-            self.set_height()
-            new_root.set_height()
+            self.update()
+            new_root.update()
             return new_root
 
         def __str__(self):
@@ -35,34 +56,384 @@ class AVLTree(object):
         def __repr__(self):
             return str(self)
 
-    def __init__(self):
+    class Cursor(object):
+        """Resumable in-order position, seeks in O(log n) and steps in O(1) amortized"""
+        __slots__ = ('_tree', '_reverse', '_stack', '_version')
+
+        def __init__(self, tree, key=None, reverse: bool = False):
+            self._tree = tree
+            self._reverse = reverse
+            self.seek(key)
+
+        def seek(self, key=None):
+            """Move to the first value >= key, or to the last value < key when reversed.
+            None moves to the first (last) value."""
+            stack = self._stack = []
+            reverse = self._reverse
+            node = self._tree.root
+            while node is not None:
+                if key is None:
+                    stack.append(node)
+                    node = node.right if reverse else node.left
+                elif reverse:
+                    if node.val < key:
+                        stack.append(node)
+                        node = node.right
+                    else:
+                        node = node.left
+                elif node.val < key:
+                    node = node.right
+                else:
+                    stack.append(node)
+                    node = node.left
+            self._version = self._tree._version
+
+        def __iter__(self):
+            return self
+
+        def __next__(self):
+            if self._version != self._tree._version:
+                raise RuntimeError('Tree changed during iteration')
+            stack = self._stack
+            if not stack:
+                raise StopIteration
+            node = stack.pop()
+            if self._reverse:
+                child = node.left
+                while child is not None:
+                    stack.append(child)
+                    child = child.right
+            else:
+                child = node.right
+                while child is not None:
+                    stack.append(child)
+                    child = child.left
+            return node.val
+
+    def __init__(self, persistent: bool = False):
+        """A persistent tree never mutates a reachable node, writes copy the
+        O(log n) path they touch and swap in the new root"""
         self.root = None
+        self.persistent = persistent
+        self._version = 0
+
+    def snapshot(self):
+        """O(1) read-only version of a persistent tree, safe to traverse
+        without locks while writes continue"""
+        if not self.persistent:
+            raise ValueError('Snapshots require a persistent tree')
+        tree = self.__class__(True)
+        tree.root = self.root
+        return tree
+
+    def cursor(self, key=None, reverse: bool = False)->Cursor:
+        return self.Cursor(self, key, reverse)
+
+    def iter_range(self, lo=None, hi=None, reverse: bool = False):
+        """Lazily yield values lo <= val < hi, None leaves a side unbounded"""
+        if reverse:
+            for val in self.Cursor(self, hi, True):
+                if lo is not None and val < lo:
+                    return
+                yield val
+        else:
+            for val in self.Cursor(self, lo):
+                if hi is not None and not val < hi:
+                    return
+                yield val
+
+    def __iter__(self):
+        return self.Cursor(self)
 
     def insert(self, val):
-        self.root = self._insert(self.root, val)
+        self._version += 1
+        if self.persistent:
+            self.root = self._insert(self.root, val, True)
+            return
+        path = []
+        lefts = []
+        node = self.root
+        while node is not None:
+            is_left = val < node.val
+            path.append(node)
+            lefts.append(is_left)
+            node = node.left if is_left else node.right
 
-    def _insert(self, root: Node, val) -> Node:
+        child = self.Node(val)
+        while path:
+            node = path.pop()
+            if lefts.pop():
+                node.left = child
+            else:
+                node.right = child
+            node.size += 1
+            left, right = node.left, node.right
+            lh = -1 if left is None else left.height
+            rh = -1 if right is None else right.height
+            if lh - rh > 1 or rh - lh > 1:
+                # a rotation restores the subtree height from before the insert
+                node = AVLTree._balance(node)
+                if not path:
+                    self.root = node
+                elif lefts[-1]:
+                    path[-1].left = node
+                else:
+                    path[-1].right = node
+                break
+            height = (lh if lh > rh else rh) + 1
+            if height == node.height:
+                break
+            node.height = height
+            child = node
+        else:
+            self.root = child
+            return
+        # heights above are unchanged, only sizes grow
+        for node in path:
+            node.size += 1
+
+    def insert_many(self, iterable):
+        values = list(iterable)
+        self._version += 1
+        if len(values) >= len(self):
+            # merging with the in-order values and rebuilding is O(n + m log m)
+            values.sort()
+            values = list(heapq.merge(AVLTree._in_order(self.root), values))
+            self.root = self._build(values, 0, len(values))
+            return
+        insert = self.insert
+        for val in values:
+            insert(val)
+
+    @staticmethod
+    def _in_order(root: Node):
+        stack = []
+        while stack or root is not None:
+            if root is not None:
+                stack.append(root)
+                root = root.left
+            else:
+                root = stack.pop()
+                yield root.val
+                root = root.right
+
+    def _insert(self, root: Node, val, copy: bool = False) -> Node:
         if root is None:
             return self.Node(val)
+        if copy:
+            root = root.copy()
+        if val < root.val:
+            root.left = self._insert(root.left, val, copy)
+        else:
+            root.right = self._insert(root.right, val, copy)
+        root.update()
+        return AVLTree._balance(root, copy)
+
+    def delete(self, val):
+        self._version += 1
+        self.root = self._delete(self.root, val, self.persistent)
+
+    def _delete(self, root: Node, val, copy: bool = False) -> Node:
+        if root is None:
+            raise ValueError(f'{val} is not in tree')
+        if copy:
+            root = root.copy()
         if val < root.val:
-            root.left = self._insert(root.left, val)
+            root.left = self._delete(root.left, val, copy)
+        elif root.val < val:
+            root.right = self._delete(root.right, val, copy)
         else:
-            root.right = self._insert(root.right, val)
-        root.set_height()
-        return AVLTree._balance(root)
+            if root.left is None:
+                return root.right
+            if root.right is None:
+                return root.left
+            right, successor = AVLTree._pop_min(root.right, copy)
+            successor.left = root.left
+            successor.right = right
+            root = successor
+        root.update()
+        return AVLTree._balance(root, copy)
 
     @staticmethod
-    def _balance(root: Node)->Node:
+    def _pop_min(root: Node, copy: bool = False)->(Node, Node):
+        """Detach the smallest node, returns (new root, detached node)"""
+        if copy:
+            root = root.copy()
+        if root.left is None:
+            right = root.right
+            root.right = None
+            root.update()
+            return right, root
+        root.left, node = AVLTree._pop_min(root.left, copy)
+        root.update()
+        return AVLTree._balance(root, copy), node
+
+    @classmethod
+    def from_sorted(cls, iterable, persistent: bool = False):
+        """Build a balanced tree from sorted values in O(n)"""
+        values = list(iterable)
+        if any(b < a for a, b in zip(values, values[1:])):
+            raise ValueError('Values are not sorted')
+        tree = cls(persistent)
+        tree.root = tree._build(values, 0, len(values))
+        return tree
+
+    def _build(self, values: list, lo: int, hi: int) -> Node:
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        root = self.Node(values[mid])
+        root.left = self._build(values, lo, mid)
+        root.right = self._build(values, mid + 1, hi)
+        root.update()
+        return root
+
+    @classmethod
+    def join(cls, t1, t2):
+        """Concatenate trees where no value of t1 is greater than a value of t2.
+        Runs in O(log n). Nodes are moved out of the arguments, so a non-persistent
+        argument is left empty, a persistent one is kept and makes the result persistent."""
+        if t1.root is not None and t2.root is not None:
+            if AVLTree._min_node(t2.root).val < AVLTree._max_node(t1.root).val:
+                raise ValueError('Trees overlap')
+        persistent = t1.persistent or t2.persistent
+        tree = cls(persistent)
+        if t2.root is None:
+            tree.root = t1.root
+        else:
+            right, pivot = AVLTree._pop_min(t2.root, persistent)
+            tree.root = AVLTree._join(t1.root, pivot, right, persistent)
+        for t in (t1, t2):
+            if not t.persistent:
+                t.root = None
+                t._version += 1
+        return tree
+
+    def split(self, key):
+        """Split into trees of values < key and values >= key.
+        Runs in O(log n). Nodes are moved so the tree is left empty,
+        unless it is persistent."""
+        left, right = AVLTree._split(self.root, key, self.persistent)
+        if not self.persistent:
+            self.root = None
+            self._version += 1
+        trees = self.__class__(self.persistent), self.__class__(self.persistent)
+        trees[0].root, trees[1].root = left, right
+        return trees
+
+    @staticmethod
+    def _split(root: Node, key, copy: bool = False)->(Node, Node):
+        if root is None:
+            return None, None
+        if copy:
+            root = root.copy()
+        if key <= root.val:
+            left, right = AVLTree._split(root.left, key, copy)
+            return left, AVLTree._join(right, root, root.right, copy)
+        left, right = AVLTree._split(root.right, key, copy)
+        return AVLTree._join(root.left, root, left, copy), right
+
+    @staticmethod
+    def _join(left: Node, pivot: Node, right: Node, copy: bool = False)->Node:
+        """Join two subtrees around pivot, left < pivot <= right"""
+        if AVLTree._height(left) > AVLTree._height(right) + 1:
+            return AVLTree._join_right(left, pivot, right, copy)
+        if AVLTree._height(right) > AVLTree._height(left) + 1:
+            return AVLTree._join_left(left, pivot, right, copy)
+        pivot.left = left
+        pivot.right = right
+        pivot.update()
+        return pivot
+
+    @staticmethod
+    def _join_right(left: Node, pivot: Node, right: Node, copy: bool = False)->Node:
+        # walk down the right spine of the taller left tree
+        if copy:
+            left = left.copy()
+        if AVLTree._height(left.right) <= AVLTree._height(right) + 1:
+            pivot.left = left.right
+            pivot.right = right
+            pivot.update()
+            left.right = pivot
+        else:
+            left.right = AVLTree._join_right(left.right, pivot, right, copy)
+        left.update()
+        return AVLTree._balance(left, copy)
+
+    @staticmethod
+    def _join_left(left: Node, pivot: Node, right: Node, copy: bool = False)->Node:
+        if copy:
+            right = right.copy()
+        if AVLTree._height(right.left) <= AVLTree._height(left) + 1:
+            pivot.left = left
+            pivot.right = right.left
+            pivot.update()
+            right.left = pivot
+        else:
+            right.left = AVLTree._join_left(left, pivot, right.left, copy)
+        right.update()
+        return AVLTree._balance(right, copy)
+
+    @staticmethod
+    def _min_node(root: Node)->Node:
+        while root.left is not None:
+            root = root.left
+        return root
+
+    @staticmethod
+    def _max_node(root: Node)->Node:
+        while root.right is not None:
+            root = root.right
+        return root
+
+    def rank(self, val)->int:
+        """Number of values strictly less than val"""
+        rank = 0
+        node = self.root
+        while node is not None:
+            if val <= node.val:
+                node = node.left
+            else:
+                rank += AVLTree._size(node.left) + 1
+                node = node.right
+        return rank
+
+    def select(self, k: int):
+        """k-th smallest value, zero based"""
+        if not 0 <= k < len(self):
+            raise IndexError('Index out of range')
+        node = self.root
+        while True:
+            left_size = AVLTree._size(node.left)
+            if k < left_size:
+                node = node.left
+            elif k == left_size:
+                return node.val
+            else:
+                k -= left_size + 1
+                node = node.right
+
+    @staticmethod
+    def _balance(root: Node, copy: bool = False)->Node:
+        """With copy, nodes below root are copied before they are rotated"""
         if AVLTree._is_left_heavy(root):
-            if AVLTree._balance_factor(root.left) > 0:
+            if copy:
+                root.left = root.left.copy()
+            if AVLTree._balance_factor(root.left) >= 0:
                 root = root.rotate_right()
             else:
+                if copy:
+                    root.left.right = root.left.right.copy()
                 root.left = root.left.rotate_left()
                 root = root.rotate_right()
         elif AVLTree._is_right_heavy(root):
-            if AVLTree._balance_factor(root.right) < 0:
+            if copy:
+                root.right = root.right.copy()
+            if AVLTree._balance_factor(root.right) <= 0:
                 root = root.rotate_left()
             else:
+                if copy:
+                    root.right.left = root.right.left.copy()
                 root.right = root.right.rotate_right()
                 root = root.rotate_left()
         return root
@@ -114,28 +485,30 @@ class AVLTree(object):
     def size(self):
         return AVLTree._size(self.root)
 
+    def __len__(self):
+        return AVLTree._size(self.root)
+
     @staticmethod
     def _size(root: Node)->int:
-        if root is None:
-            return 0
-        return AVLTree._size(root.left) + AVLTree._size(root.right) + 1
-
-
-tree = AVLTree()
-tree.insert(10)
-tree.insert(12)
-tree.insert(11)
-tree.insert(8)
-tree.insert(13)
-tree.insert(16)
-tree.insert(12)
-tree.insert(13)
-tree.insert(9)
-tree.insert(11)
-tree.insert(17)
-tree.insert(7)
-tree.insert(8)
-tree.insert(9)
-tree.insert(10)
-
-print(tree.is_perfect())
+        return 0 if root is None else root.size
+
+
+if __name__ == '__main__':
+    tree = AVLTree()
+    tree.insert(10)
+    tree.insert(12)
+    tree.insert(11)
+    tree.insert(8)
+    tree.insert(13)
+    tree.insert(16)
+    tree.insert(12)
+    tree.insert(13)
+    tree.insert(9)
+    tree.insert(11)
+    tree.insert(17)
+    tree.insert(7)
+    tree.insert(8)
+    tree.insert(9)
+    tree.insert(10)
+
+    print(tree.is_perfect())
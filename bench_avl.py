@@ -0,0 +1,73 @@
+"""AVLTree benchmarks, usage: python bench_avl.py [n ...]"""
+import random
+import sys
+import time
+import tracemalloc
+
+from AVLTree import AVLTree
+
+
+class LegacyAVLTree(AVLTree):
+    """Recursive insert over __dict__ based nodes, the path insert replaced"""
+    class Node(object):
+        def __init__(self, val):
+            self.val = val
+            self.height = 0
+            self.size = 1
+            self.right = None
+            self.left = None
+
+        set_height = AVLTree.Node.set_height
+        set_size = AVLTree.Node.set_size
+        update = AVLTree.Node.update
+        rotate_left = AVLTree.Node.rotate_left
+        rotate_right = AVLTree.Node.rotate_right
+
+    def insert(self, val):
+        self.root = self._insert(self.root, val)
+
+
+def build_one_by_one(cls, values):
+    tree = cls()
+    for val in values:
+        tree.insert(val)
+    return tree
+
+
+def build_many(cls, values):
+    tree = cls()
+    tree.insert_many(values)
+    return tree
+
+
+def measure(build, cls, values):
+    start = time.perf_counter()
+    tree = build(cls, values)
+    elapsed = time.perf_counter() - start
+    del tree
+
+    tracemalloc.start()
+    tree = build(cls, values)
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tree
+    return elapsed, memory
+
+
+def bench_insert(n: int):
+    values = list(range(n))
+    random.shuffle(values)
+    cases = [
+        ('recursive insert', build_one_by_one, LegacyAVLTree),
+        ('iterative insert', build_one_by_one, AVLTree),
+        ('insert_many', build_many, AVLTree),
+    ]
+    for name, build, cls in cases:
+        elapsed, memory = measure(build, cls, values)
+        print(f'{n:>10} {name:<18} {n / elapsed:>12,.0f} keys/s {memory / n:>8.1f} B/key')
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10 ** 5, 10 ** 6, 10 ** 7]
+    for size in sizes:
+        bench_insert(size)
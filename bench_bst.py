@@ -0,0 +1,153 @@
+"""BST benchmarks, usage: python bench_bst.py [n ...]"""
+import queue
+import random
+import sys
+import threading
+import time
+
+from bst import BST, ConcurrentBST
+
+
+def build(values: list, lo: int, hi: int):
+    """Balanced tree over sorted values, skips insert to keep setup cheap"""
+    if lo >= hi:
+        return None
+    mid = (lo + hi) // 2
+    node = BST.Node(values[mid])
+    node.left = build(values, lo, mid)
+    node.right = build(values, mid + 1, hi)
+    for child in (node.left, node.right):
+        if child is not None:
+            node.size += child.size
+            node.height = max(node.height, child.height + 1)
+    return node
+
+
+def lifo_pre_order(root):
+    stack = queue.LifoQueue()
+    stack.put(root)
+    while not stack.empty():
+        node = stack.get()
+        yield node
+        if node.right is not None:
+            stack.put(node.right)
+        if node.left is not None:
+            stack.put(node.left)
+
+
+def lifo_in_order(root):
+    stack = queue.LifoQueue()
+    node = root
+    while not stack.empty() or node is not None:
+        if node is not None:
+            stack.put(node)
+            node = node.left
+        else:
+            node = stack.get()
+            yield node
+            node = node.right
+
+
+def pop_zero_level_order(root):
+    q = [root]
+    while q:
+        node = q.pop(0)
+        yield node
+        if node.left is not None:
+            q.append(node.left)
+        if node.right is not None:
+            q.append(node.right)
+
+
+def timed(traversal, root)->float:
+    start = time.perf_counter()
+    for _ in traversal(root):
+        pass
+    return time.perf_counter() - start
+
+
+def bench_traverse(n: int):
+    tree = BST()
+    tree.root = build(list(range(n)), 0, n)
+    cases = [
+        ('pre_order', lifo_pre_order, BST._pre_order),
+        ('in_order', lifo_in_order, BST._in_order),
+        ('morris_in_order', lifo_in_order, BST._morris_in_order),
+        ('post_order', None, BST._post_order),
+        ('level_order', pop_zero_level_order, BST._level_order),
+    ]
+    for name, old, new in cases:
+        new_time = timed(new, tree.root)
+        if old is None:
+            print(f'{n:>10} {name:<16} {"-":>9} {new_time:>8.3f}s')
+            continue
+        old_time = timed(old, tree.root)
+        print(f'{n:>10} {name:<16} {old_time:>8.3f}s {new_time:>8.3f}s {old_time / new_time:>6.1f}x')
+
+
+def bench_lookup(n: int):
+    tree = BST()
+    tree.root = build(list(range(0, 2 * n, 2)), 0, n)
+    frozen = tree.freeze()
+    keys = [random.randrange(2 * n) for _ in range(n)]
+
+    start = time.perf_counter()
+    for key in keys:
+        tree.exist(key)
+    exist_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for key in keys:
+        key in frozen
+    frozen_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    frozen.contains_many(keys)
+    many_time = time.perf_counter() - start
+
+    print(f'{n:>10} exist {n / exist_time:>12,.0f}/s  frozen {n / frozen_time:>12,.0f}/s  '
+          f'contains_many {n / many_time:>12,.0f}/s')
+
+
+class CoarseLockedBST(object):
+    """The baseline, one lock around a plain BST"""
+    def __init__(self):
+        self._tree = BST()
+        self._lock = threading.Lock()
+
+    def insert(self, val):
+        with self._lock:
+            self._tree.insert(val)
+
+    def exist(self, val)->bool:
+        with self._lock:
+            return self._tree.exist(val)
+
+
+def bench_concurrent(n: int, threads: int = 8):
+    values = list(range(n))
+    random.shuffle(values)
+
+    def work(tree, chunk):
+        for val in chunk:
+            tree.insert(val)
+            tree.exist(val)
+
+    for cls in (CoarseLockedBST, ConcurrentBST):
+        tree = cls()
+        workers = [threading.Thread(target=work, args=(tree, values[i::threads])) for i in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        print(f'{n:>10} {threads} threads {cls.__name__:<16} {2 * n / elapsed:>12,.0f} ops/s')
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10 ** 6]
+    for size in sizes:
+        bench_traverse(size)
+        bench_lookup(size)
+        bench_concurrent(size)
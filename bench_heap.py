@@ -0,0 +1,159 @@
+"""Heap benchmarks, usage: python bench_heap.py [n ...]"""
+import asyncio
+import heapq
+import queue
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+from heap import Heap, DaryHeap, NumericHeap
+from priority_queue import HeapQueue, AsyncHeapQueue
+
+
+def push_pop_heap(values: list):
+    heap = Heap(len(values), is_max=False)
+    for val in values:
+        heap.insert(val)
+    for _ in values:
+        heap.remove()
+
+
+def push_pop_dary(arity: int):
+    def run(values: list):
+        heap = DaryHeap(arity, is_max=False)
+        for val in values:
+            heap.insert(val)
+        for _ in values:
+            heap.remove()
+    return run
+
+
+def push_pop_heapq(values: list):
+    heap = []
+    for val in values:
+        heapq.heappush(heap, val)
+    for _ in values:
+        heapq.heappop(heap)
+
+
+def bench_push_pop(n: int):
+    values = [random.random() for _ in range(n)]
+    cases = [
+        ('Heap', push_pop_heap),
+        ('DaryHeap(2)', push_pop_dary(2)),
+        ('DaryHeap(4)', push_pop_dary(4)),
+        ('DaryHeap(8)', push_pop_dary(8)),
+        ('heapq', push_pop_heapq),
+    ]
+    for name, run in cases:
+        start = time.perf_counter()
+        run(values)
+        elapsed = time.perf_counter() - start
+        print(f'{n:>10} {name:<12} {2 * n / elapsed:>12,.0f} ops/s')
+
+
+def bench_numeric_build(n: int):
+    values = [random.random() for _ in range(n)]
+    cases = [
+        # fresh float objects so their boxes count against the Heap
+        ('Heap', lambda: Heap(n, [val * 1.0 for val in values], is_max=False)),
+        ('NumericHeap', lambda: NumericHeap(values)),
+        ('NumericHeap+ids', lambda: NumericHeap(values, range(n))),
+    ]
+    for name, build in cases:
+        start = time.perf_counter()
+        heap = build()
+        elapsed = time.perf_counter() - start
+        del heap
+        tracemalloc.start()
+        heap = build()
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del heap
+        print(f'{n:>10} build {name:<16} {elapsed:>8.3f}s {memory / n:>8.1f} B/item')
+
+
+STOP = float('inf')
+
+
+def run_threads(q, n: int, producers: int, consumers: int, batch: int)->float:
+    def produce(count: int):
+        for _ in range(count):
+            q.put(random.random())
+
+    def consume():
+        while True:
+            items = q.get_many(batch) if batch > 1 else [q.get()]
+            stops = items.count(STOP)
+            if stops:
+                # hand the extra stop markers back to the other consumers
+                for _ in range(stops - 1):
+                    q.put(STOP)
+                return
+
+    threads = [threading.Thread(target=produce, args=(n // producers,)) for _ in range(producers)]
+    workers = [threading.Thread(target=consume) for _ in range(consumers)]
+    start = time.perf_counter()
+    for thread in threads + workers:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for _ in workers:
+        q.put(STOP)
+    for worker in workers:
+        worker.join()
+    return time.perf_counter() - start
+
+
+async def run_tasks(q, n: int, producers: int, consumers: int, batch: int)->float:
+    async def produce(count: int):
+        for _ in range(count):
+            await q.put(random.random())
+
+    async def consume():
+        while True:
+            items = await q.get_many(batch) if batch > 1 else [await q.get()]
+            stops = items.count(STOP)
+            if stops:
+                for _ in range(stops - 1):
+                    await q.put(STOP)
+                return
+
+    start = time.perf_counter()
+    workers = [asyncio.create_task(consume()) for _ in range(consumers)]
+    await asyncio.gather(*(produce(n // producers) for _ in range(producers)))
+    for _ in workers:
+        await q.put(STOP)
+    await asyncio.gather(*workers)
+    return time.perf_counter() - start
+
+
+def bench_queues(n: int, producers: int = 8, consumers: int = 8, maxsize: int = 1024):
+    cases = [
+        ('queue.PriorityQueue', lambda: queue.PriorityQueue(maxsize), 1),
+        ('HeapQueue', lambda: HeapQueue(maxsize), 1),
+        ('HeapQueue get_many', lambda: HeapQueue(maxsize), 64),
+    ]
+    for name, make, batch in cases:
+        elapsed = run_threads(make(), n, producers, consumers, batch)
+        print(f'{n:>10} threads {name:<24} {n / elapsed:>12,.0f} items/s')
+    cases = [
+        ('asyncio.PriorityQueue', lambda: asyncio.PriorityQueue(maxsize), 1),
+        ('AsyncHeapQueue', lambda: AsyncHeapQueue(maxsize), 1),
+        ('AsyncHeapQueue get_many', lambda: AsyncHeapQueue(maxsize), 64),
+    ]
+    for name, make, batch in cases:
+        async def run():
+            return await run_tasks(make(), n, producers, consumers, batch)
+        elapsed = asyncio.run(run())
+        print(f'{n:>10} asyncio {name:<24} {n / elapsed:>12,.0f} items/s')
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10 ** 5, 10 ** 6]
+    for size in sizes:
+        bench_push_pop(size)
+        bench_numeric_build(size)
+        bench_queues(size)
@@ -0,0 +1,280 @@
+"""Trie benchmarks, usage: python bench_trie.py [n ...]"""
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from contact_list import ContactList
+from dawg import DAWG
+from double_array import compile_trie, DoubleArrayTrie
+from prefix_tree import Trie, RadixTrie
+import trie_array
+
+
+def random_word(alphabet: str, low: int, high: int)->str:
+    return ''.join(random.choices(alphabet, k=random.randint(low, high)))
+
+
+def url_list(n: int)->list:
+    """URL shaped keys, long shared prefixes with unique tails"""
+    hosts = [f'https://www.{random_word(string.ascii_lowercase, 4, 12)}.com/' for _ in range(max(n // 100, 1))]
+    sections = [random_word(string.ascii_lowercase, 3, 10) for _ in range(50)]
+    return [
+        f'{random.choice(hosts)}{random.choice(sections)}/{random_word(string.ascii_lowercase + string.digits, 6, 16)}'
+        for _ in range(n)
+    ]
+
+
+def build(cls, words: list):
+    trie = cls()
+    for word in words:
+        trie.insert(word)
+    return trie
+
+
+def bench_radix(n: int):
+    words = url_list(n)
+    missing = [word + 'x' for word in words[:n // 10]]
+    for cls in (Trie, RadixTrie):
+        tracemalloc.start()
+        trie = build(cls, words)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start = time.perf_counter()
+        for word in words:
+            word in trie
+        for word in missing:
+            word in trie
+        elapsed = time.perf_counter() - start
+        print(f'{n:>10} {cls.__name__:<10} {memory / 2 ** 20:>9.1f} MiB {(len(words) + len(missing)) / elapsed:>12,.0f} lookups/s')
+        del trie
+
+
+class RecursiveTrie(Trie):
+    """The recursive, slicing insert and lookup that Trie replaced"""
+    @classmethod
+    def _insert(cls, root, word: str, path: list = None):
+        path = [root] if path is None else path
+        char = word[0]
+        if not root.has_child(char):
+            root.add_child(char)
+        path.append(root.get_child(char))
+        if len(word) == 1:
+            root.get_child(char).is_end = True
+            return path
+        return cls._insert(root.get_child(char), word[1:], path)
+
+    @classmethod
+    def _contains(cls, root, word: str)->bool:
+        char = word[0]
+        if not root.has_child(char):
+            return False
+        if len(word) == 1:
+            return root.get_child(char).is_end
+        return cls._contains(root.get_child(char), word[1:])
+
+
+def bench_long_keys(total_chars: int = 10 ** 6):
+    for length in (10, 100, 1000, 10000):
+        words = [random_word('acgt', length, length) for _ in range(max(total_chars // length, 1))]
+        for cls in (RecursiveTrie, Trie):
+            trie = cls()
+            try:
+                start = time.perf_counter()
+                for word in words:
+                    trie.insert(word)
+                insert_time = time.perf_counter() - start
+                start = time.perf_counter()
+                for word in words:
+                    word in trie
+                lookup_time = time.perf_counter() - start
+            except RecursionError:
+                print(f'{length:>6} chars {cls.__name__:<14} RecursionError')
+                continue
+            print(f'{length:>6} chars {cls.__name__:<14} insert {total_chars / insert_time:>12,.0f} chars/s  '
+                  f'lookup {total_chars / lookup_time:>12,.0f} chars/s')
+        trie = Trie()
+        start = time.perf_counter()
+        trie.insert_many(words)
+        insert_time = time.perf_counter() - start
+        start = time.perf_counter()
+        trie.contains_many(words)
+        lookup_time = time.perf_counter() - start
+        print(f'{length:>6} chars {"Trie *_many":<14} insert {total_chars / insert_time:>12,.0f} chars/s  '
+              f'lookup {total_chars / lookup_time:>12,.0f} chars/s')
+
+
+def bench_ranked(n: int):
+    trie = Trie()
+    for _ in range(n):
+        trie.insert(random_word(string.ascii_lowercase, 3, 10), random.randint(1, 1000))
+    for limit, name in ((None, 'all'), (10, 'limit=10'), (100, 'limit=100')):
+        start = time.perf_counter()
+        for _ in range(100):
+            trie.autocomplete('a', limit)
+        elapsed = (time.perf_counter() - start) / 100
+        print(f'{n:>10} autocomplete("a") {name:<10} {elapsed * 1000:>10.3f} ms')
+
+
+def bench_array_trie(n: int):
+    cases = [
+        ('lowercase', string.ascii_lowercase, trie_array.LOWERCASE),
+        ('digits', string.digits, trie_array.DIGITS),
+        ('utf-8', string.ascii_lowercase + 'äöüéß', trie_array.UTF8),
+    ]
+    for name, symbols, alphabet in cases:
+        words = [random_word(symbols, 4, 12) for _ in range(n)]
+        for label, make in (('prefix_tree', Trie), ('trie_array', lambda: trie_array.Trie(alphabet))):
+            tracemalloc.start()
+            trie = build(make, words)
+            memory, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del trie
+            start = time.perf_counter()
+            trie = build(make, words)
+            insert_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for word in words:
+                word in trie
+            lookup_time = time.perf_counter() - start
+            print(f'{n:>10} {name:<10} {label:<12} {memory / 2 ** 20:>9.1f} MiB  insert {n / insert_time:>10,.0f}/s  '
+                  f'lookup {n / lookup_time:>10,.0f}/s')
+            del trie
+
+
+def inflected_list(n: int)->list:
+    """Stems with English style endings, the suffix sharing of real vocabularies"""
+    endings = ['', 's', 'ed', 'ing', 'er', 'ers', 'able', 'ation', 'ations', 'ness', 'less', 'ly']
+    stems = [random_word(string.ascii_lowercase, 3, 9) for _ in range(max(n // len(endings), 1))]
+    return [stem + ending for stem in stems for ending in endings]
+
+
+def bench_dawg(n: int):
+    domains = [f'{random_word(string.ascii_lowercase, 3, 12)}.{random.choice(["com", "net", "org", "co.uk", "de"])}'
+               for _ in range(n)]
+    for name, words in (('inflections', inflected_list(n)), ('domains', domains)):
+        words = sorted(set(words))
+        tracemalloc.start()
+        trie = Trie()
+        trie.insert_many(words)
+        trie_memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        trie_nodes = sum(1 for _ in trie._traverse_pre(trie.root))
+        del trie
+
+        start = time.perf_counter()
+        DAWG(words)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        dawg = DAWG(words)
+        dawg_memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        dawg_nodes = dawg.count_nodes()
+        print(f'{len(words):>10} {name:<12} Trie {trie_nodes:>10,} nodes {trie_memory / 2 ** 20:>8.1f} MiB  '
+              f'DAWG {dawg_nodes:>10,} nodes {dawg_memory / 2 ** 20:>8.1f} MiB  '
+              f'{trie_nodes / dawg_nodes:>5.1f}x fewer, built in {elapsed:.2f}s')
+
+
+def bench_contacts(n: int, queries: int = 100):
+    contacts = ContactList()
+    for _ in range(n):
+        contacts.add(random_word(string.digits, 11, 11), random_word(string.ascii_lowercase, 3, 10),
+                     random_word(string.ascii_lowercase, 3, 12),
+                     f'{random.randint(1, 200)} {random_word(string.ascii_lowercase, 4, 10)} street')
+    cases = [
+        ('phone prefix', {'phone': '8916'}, lambda contact: contact.phone.startswith('8916')),
+        ('phone suffix', {'phone_suffix': '4576'}, lambda contact: contact.phone.endswith('4576')),
+        ('surname+suffix', {'surname': 'jo', 'phone_suffix': '77'},
+         lambda contact: contact.surname.startswith('jo') and contact.phone.endswith('77')),
+    ]
+    for name, query, predicate in cases:
+        start = time.perf_counter()
+        for _ in range(queries):
+            [contact for contact in contacts.get_all() if predicate(contact)]
+        scan = (time.perf_counter() - start) / queries
+        start = time.perf_counter()
+        for _ in range(queries):
+            found = contacts.find(**query)
+        indexed = (time.perf_counter() - start) / queries
+        print(f'{n:>10} find {name:<16} {len(found):>6} hits  scan {scan * 1000:>9.2f} ms  index {indexed * 1000:>8.3f} ms')
+
+
+def levenshtein(a: str, b: str)->int:
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        row = [i]
+        for j, other in enumerate(b, 1):
+            row.append(min(row[j - 1] + 1, previous[j] + 1, previous[j - 1] + (char != other)))
+        previous = row
+    return previous[-1]
+
+
+def bench_fuzzy(n: int, queries: int = 5, max_distance: int = 2):
+    words = [random_word(string.ascii_lowercase, 4, 12) for _ in range(n)]
+    trie = Trie()
+    trie.insert_many(words)
+    unique = list(set(words))
+    # typos of real words, one substituted char
+    targets = []
+    for word in random.sample(unique, queries):
+        i = random.randrange(len(word))
+        targets.append(word[:i] + random.choice(string.ascii_lowercase) + word[i + 1:])
+
+    start = time.perf_counter()
+    for target in targets:
+        [word for word in unique if abs(len(word) - len(target)) <= max_distance and levenshtein(target, word) <= max_distance]
+    brute = (time.perf_counter() - start) / queries
+    start = time.perf_counter()
+    for target in targets:
+        trie.fuzzy_search(target, max_distance)
+    fuzzy = (time.perf_counter() - start) / queries
+    print(f'{n:>10} fuzzy_search k={max_distance} brute force {brute * 1000:>10.1f} ms  trie {fuzzy * 1000:>8.1f} ms')
+
+    start = time.perf_counter()
+    for target in targets:
+        trie.fuzzy_autocomplete(target[:4], 1)
+    print(f'{n:>10} fuzzy_autocomplete k=1 prefix of 4 {(time.perf_counter() - start) / queries * 1000:>8.1f} ms')
+
+
+def bench_startup(n: int):
+    words = url_list(n)
+    start = time.perf_counter()
+    trie = Trie()
+    trie.insert_many(words)
+    print(f'{n:>10} startup Trie.insert_many      {time.perf_counter() - start:>10.4f}s')
+
+    fd, path = tempfile.mkstemp(suffix='.dat')
+    os.close(fd)
+    try:
+        start = time.perf_counter()
+        compile_trie(trie, path)
+        print(f'{n:>10} compile_trie                  {time.perf_counter() - start:>10.4f}s '
+              f'{os.path.getsize(path) / 2 ** 20:>8.1f} MiB file')
+        start = time.perf_counter()
+        mapped = DoubleArrayTrie(path)
+        print(f'{n:>10} startup DoubleArrayTrie       {time.perf_counter() - start:>10.4f}s')
+        for name, target in (('Trie', trie), ('DoubleArrayTrie', mapped)):
+            start = time.perf_counter()
+            for word in words:
+                word in target
+            print(f'{n:>10} {name:<16} {n / (time.perf_counter() - start):>12,.0f} lookups/s')
+        mapped.close()
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10 ** 5, 10 ** 6]
+    for size in sizes:
+        bench_radix(size)
+        bench_ranked(size)
+        bench_startup(size)
+        bench_fuzzy(size)
+        bench_array_trie(size)
+        bench_dawg(size)
+        bench_contacts(size)
+    bench_long_keys()
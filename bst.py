@@ -1,10 +1,19 @@
-import queue
+import bisect
+import collections
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 
 class BST(object):
     class Node(object):
         def __init__(self, val):
             self.val = val
+            self.size = 1
+            self.height = 0
             self.right = None
             self.left = None
 
@@ -36,39 +45,208 @@ class BST(object):
         def __xor__(self, other):
             return self.val != other.val
 
+    class Frozen(object):
+        """Immutable sorted snapshot, lookups bisect the value tuple"""
+        __slots__ = ('_values', '_array')
+
+        def __init__(self, values: list):
+            self._values = tuple(values)
+            self._array = None
+
+        def __contains__(self, val)->bool:
+            values = self._values
+            i = bisect.bisect_left(values, val)
+            return i != len(values) and values[i] == val
+
+        def contains_many(self, keys)->[bool]:
+            if not hasattr(keys, '__len__'):
+                # generators and other one-shot iterables
+                keys = list(keys)
+            sorted_values = self._numeric_values()
+            if sorted_values is not None:
+                probe = np.asarray(keys)
+                if probe.ndim == 1 and probe.dtype.kind in 'iuf':
+                    index = np.searchsorted(sorted_values, probe)
+                    found = index < len(sorted_values)
+                    found[found] = sorted_values[index[found]] == probe[found]
+                    return found.tolist()
+            return [key in self for key in keys]
+
+        def _numeric_values(self):
+            if np is None or not self._values:
+                return None
+            if self._array is None:
+                array = np.asarray(self._values)
+                self._array = array if array.dtype.kind in 'iuf' else False
+            return self._array if self._array is not False else None
+
+        def __len__(self):
+            return len(self._values)
+
+        def __iter__(self):
+            return iter(self._values)
+
     def __init__(self):
         self.root = None
+        self._min_node = None
+        self._max_node = None
 
     def insert(self, val):
         node = self.Node(val)
         if self.root is None:
-            self.root = node
-        else:
-            self._insert(self.root, node)
+            self.root = self._min_node = self._max_node = node
+            return
+        self._insert(self.root, node)
+        if node < self._min_node:
+            self._min_node = node
+        elif node >= self._max_node:
+            self._max_node = node
 
     def _insert(self, root: Node, node: Node):
-        if root.left is None and root > node:
-            root.left = node
-        elif root.right is None and root <= node:
-            root.right = node
-        elif root.left is not None and root > node:
-            self._insert(root.left, node)
-        elif root.right is not None and root <= node:
-            self._insert(root.right, node)
+        path = []
+        val = node.val
+        while True:
+            path.append(root)
+            if val < root.val:
+                if root.left is None:
+                    root.left = node
+                    break
+                root = root.left
+            else:
+                if root.right is None:
+                    root.right = node
+                    break
+                root = root.right
+        # sizes grow along the whole path, heights only until one is unchanged
+        height = 0
+        for root in reversed(path):
+            root.size += 1
+            if height is not None:
+                height += 1
+                if root.height < height:
+                    root.height = height
+                else:
+                    height = None
+
+    def delete(self, val):
+        path = []
+        node = self.root
+        while node is not None and node.val != val:
+            path.append(node)
+            node = node.left if val < node.val else node.right
+        if node is None:
+            raise ValueError(f'{val} is not in tree')
+        if node.left is not None and node.right is not None:
+            # move the successor value up and unlink the successor instead
+            path.append(node)
+            successor = node.right
+            while successor.left is not None:
+                path.append(successor)
+                successor = successor.left
+            node.val = successor.val
+            node = successor
+        child = node.left if node.left is not None else node.right
+        if not path:
+            self.root = child
+        elif path[-1].left is node:
+            path[-1].left = child
+        else:
+            path[-1].right = child
+        for node in reversed(path):
+            node.size -= 1
+            node.height = 1 + max(BST._cached_height(node.left), BST._cached_height(node.right))
+        if self.root is None:
+            self._min_node = self._max_node = None
+        else:
+            node = self.root
+            while node.left is not None:
+                node = node.left
+            self._min_node = node
+            self._max_node = BST._max(self.root)
+
+    @staticmethod
+    def _cached_height(root: Node)->int:
+        return -1 if root is None else root.height
+
+    def successor(self, val):
+        """Smallest value > val, None if there is none"""
+        best = None
+        node = self.root
+        while node is not None:
+            if val < node.val:
+                best = node
+                node = node.left
+            else:
+                node = node.right
+        return None if best is None else best.val
+
+    def predecessor(self, val):
+        """Largest value < val, None if there is none"""
+        best = None
+        node = self.root
+        while node is not None:
+            if node.val < val:
+                best = node
+                node = node.right
+            else:
+                node = node.left
+        return None if best is None else best.val
+
+    def floor(self, val):
+        """Largest value <= val, None if there is none"""
+        best = None
+        node = self.root
+        while node is not None:
+            if val < node.val:
+                node = node.left
+            else:
+                best = node
+                node = node.right
+        return None if best is None else best.val
+
+    def ceiling(self, val):
+        """Smallest value >= val, None if there is none"""
+        best = None
+        node = self.root
+        while node is not None:
+            if node.val < val:
+                node = node.right
+            else:
+                best = node
+                node = node.left
+        return None if best is None else best.val
+
+    def count_range(self, lo, hi)->int:
+        """Number of values lo <= val <= hi in O(h)"""
+        if hi < lo:
+            return 0
+        return BST._count_less(self.root, hi, True) - BST._count_less(self.root, lo)
+
+    @staticmethod
+    def _count_less(root: Node, val, inclusive: bool = False)->int:
+        count = 0
+        while root is not None:
+            if root.val < val or inclusive and root.val == val:
+                count += 1 + (0 if root.left is None else root.left.size)
+                root = root.right
+            else:
+                root = root.left
+        return count
 
     def exist(self, val)->bool:
         return bool(BST._get_node(self.root, self.Node(val)))
 
+    def freeze(self)->Frozen:
+        """Read-only array snapshot for lookup heavy workloads"""
+        return BST.Frozen([node.val for node in BST._in_order(self.root)])
+
     @staticmethod
     def _get_node(root: Node, node: Node):
-        if root is None:
-            return
-        elif root == node:
-            return root
-        elif root > node:
-            return BST._get_node(root.left, node)
-        elif root < node:
-            return BST._get_node(root.right, node)
+        val = node.val
+        while root is not None:
+            if root.val == val:
+                return root
+            root = root.left if val < root.val else root.right
 
     def traverse(self, order: str):
         if not hasattr(self, f'_{order}'):
@@ -77,159 +255,203 @@ class BST(object):
 
     @staticmethod
     def _pre_order(root: Node):
-        stack = queue.LifoQueue()
-        stack.put(root)
-        while not stack.empty():
-            node = stack.get()
+        if root is None:
+            return
+        stack = [root]
+        while stack:
+            node = stack.pop()
             yield node
             if node.right is not None:
-                stack.put(node.right)
+                stack.append(node.right)
             if node.left is not None:
-                stack.put(node.left)
+                stack.append(node.left)
 
     @staticmethod
     def _post_order(root: Node):
-        stack = queue.LifoQueue()
-        stack.put(root)
-
-        while not stack.empty():
-            node = stack.get()
-            yield node
-            if node.left is not None:
-                stack.put(node.left)
-            if node.right is not None:
-                stack.put(node.right)
+        stack = []
+        node = root
+        last = None
+        while stack or node is not None:
+            if node is not None:
+                stack.append(node)
+                node = node.left
+                continue
+            top = stack[-1]
+            if top.right is not None and top.right is not last:
+                node = top.right
+            else:
+                last = stack.pop()
+                yield last
 
     @staticmethod
     def _in_order(root: Node):
-        stack = queue.LifoQueue()
-        stack.put(root)
+        stack = []
         node = root
-        while not stack.empty():
+        while stack or node is not None:
             if node is not None:
-                stack.put(node)
+                stack.append(node)
                 node = node.left
             else:
-                node = stack.get()
+                node = stack.pop()
                 yield node
                 node = node.right
 
     @staticmethod
-    def _level_order(root: Node):
-        q = list([root, None])
-
-        while True:
-            node = q.pop(0)
-
-            if node is None and len(q) and q[0] is None:
-                break
-            if node is not None:
-                yield node
-                if node.left:
-                    q.append(node.left)
-                if node.right:
-                    q.append(node.right)
+    def _morris_in_order(root: Node):
+        """In-order with O(1) extra memory, threads right links of predecessors.
+        The links are restored when the generator is exhausted or closed, the tree
+        must not be read or changed elsewhere while it is suspended."""
+        node = root
+        closing = False
+        while node is not None:
+            if node.left is None:
+                visit = node
+                node = node.right
             else:
-                q.append(None)
+                pred = node.left
+                while pred.right is not None and pred.right is not node:
+                    pred = pred.right
+                if pred.right is None:
+                    pred.right = node
+                    node = node.left
+                    continue
+                pred.right = None
+                visit = node
+                node = node.right
+            if not closing:
+                try:
+                    yield visit
+                except GeneratorExit:
+                    # keep walking without yielding to undo the threads
+                    closing = True
+
+    @staticmethod
+    def _level_order(root: Node):
+        if root is None:
+            return
+        q = collections.deque([root])
+        while q:
+            node = q.popleft()
+            yield node
+            if node.left is not None:
+                q.append(node.left)
+            if node.right is not None:
+                q.append(node.right)
 
     def height(self)->int:
-        return BST._height(self.root)
+        return -1 if self.root is None else self.root.height
 
     @staticmethod
     def _height(root: Node)->int:
-        if root is None:
-            return -1
-        return 1 + max(BST._height(root.left), BST._height(root.right))
+        """Height by walking the tree, height() reads the cached value"""
+        height = -1
+        level = [root] if root is not None else []
+        while level:
+            height += 1
+            level = [child for node in level for child in (node.left, node.right) if child is not None]
+        return height
 
     def min(self):
         if self.root is None:
             raise ValueError('Tree have no nodes')
-        return BST._min(self.root)
+        return self._min_node.val
 
     @staticmethod
     def _min(root: Node):
-        if root.left is None:
-            return root.val
-        return BST._min(root.left)
+        while root.left is not None:
+            root = root.left
+        return root.val
 
     def __eq__(self, other):
         return BST._eq(self.root, other.root)
 
     @staticmethod
     def _eq(one: Node, other: Node):
-        if one is None and other is None:
-            return True
-        elif one is not None and other is not None:
-            return one == other and BST._eq(one.left, other.left) and BST._eq(one.right, other.right)
-        return False
+        stack = [(one, other)]
+        while stack:
+            one, other = stack.pop()
+            if one is None and other is None:
+                continue
+            if one is None or other is None or not one == other:
+                return False
+            stack.append((one.right, other.right))
+            stack.append((one.left, other.left))
+        return True
 
     def is_bst(self):
         return BST._is_bst(self.root, float('-inf'), float('+inf'))
 
     @staticmethod
     def _is_bst(root: Node, lower, upper):
-        if root is None:
-            return True
-        if root.val < lower or root.val > upper:
-            return False
-        return BST._is_bst(root.left, lower, root.val) and BST._is_bst(root.right, root.val, upper)
+        stack = [(root, lower, upper)]
+        while stack:
+            root, lower, upper = stack.pop()
+            if root is None:
+                continue
+            if root.val < lower or root.val > upper:
+                return False
+            stack.append((root.right, root.val, upper))
+            stack.append((root.left, lower, root.val))
+        return True
 
     def nodes_at(self, k):
         return BST._nodes_at_distance(self.root, k)
 
     @staticmethod
     def _nodes_at_distance(root: Node, k: int):
-        if root is None:
-            return
-        if k == 0:
-            yield root.val
-        yield from BST._nodes_at_distance(root.left, k - 1)
-        yield from BST._nodes_at_distance(root.right, k - 1)
+        stack = [(root, k)]
+        while stack:
+            root, k = stack.pop()
+            if root is None or k < 0:
+                continue
+            if k == 0:
+                yield root.val
+                continue
+            stack.append((root.right, k - 1))
+            stack.append((root.left, k - 1))
 
     def size(self):
-        return BST._size(self.root)
+        return 0 if self.root is None else self.root.size
 
     @staticmethod
     def _size(root: Node, n: int = 0)->int:
-        if root is None:
-            return 0
-        return 1 + BST._size(root.left, n + 1) + BST._size(root.right, n + 1)
+        """Size by walking the tree, size() reads the cached value"""
+        return sum(1 for _ in BST._pre_order(root))
 
     def count_leaves(self):
         return BST._count_leaves(self.root)
 
     @staticmethod
     def _count_leaves(root: Node)->int:
-        if root is None:
-            return 0
-        elif root.is_leaf:
-            return 1
-        return BST._count_leaves(root.left) + BST._count_leaves(root.right)
+        return sum(1 for node in BST._pre_order(root) if node.is_leaf)
 
     def max(self):
-        return BST._max(self.root)
+        if self.root is None:
+            raise ValueError('Tree have no nodes')
+        return self._max_node
 
     @staticmethod
     def _max(root: Node)->Node:
         if root is None:
             raise ValueError('Tree have no nodes')
-        elif root.right is None:
-            return root
-        return BST._max(root.right)
+        while root.right is not None:
+            root = root.right
+        return root
 
     def are_siblings(self, a, b):
         return BST._are_siblings(self.root, a, b)
 
     @staticmethod
     def _are_siblings(root: Node, a, b)->bool:
-        if root.left is None or root.right is None:
-            return False
-        if (
-                root.left.val == a and root.right.val == b or
-                root.left.val == b and root.right.val == a
-        ):
-            return True
-        return BST._are_siblings(root.left, a, b) or BST._are_siblings(root.right, a, b)
+        for node in BST._pre_order(root):
+            if node.left is None or node.right is None:
+                continue
+            if (
+                    node.left.val == a and node.right.val == b or
+                    node.left.val == b and node.right.val == a
+            ):
+                return True
+        return False
 
     @staticmethod
     def _bc(root: Node)->int:
@@ -240,6 +462,77 @@ class BST(object):
         return 2
 
 
+class ConcurrentBST(object):
+    """BST shared between threads without a global lock. Every node has its own
+    lock and operations couple them hand-over-hand on the way down, so threads
+    working in different subtrees do not wait on each other. It does not rely on
+    the GIL and is safe on the free-threaded build."""
+    class Node(object):
+        __slots__ = ('val', 'right', 'left', 'lock')
+
+        def __init__(self, val):
+            self.val = val
+            self.right = None
+            self.left = None
+            self.lock = threading.Lock()
+
+        def __str__(self):
+            return f'<{self.__class__.__name__}: {self.val}>'
+
+        def __repr__(self):
+            return str(self)
+
+    def __init__(self):
+        self.root = None
+        self._root_lock = threading.Lock()
+
+    def insert(self, val):
+        node = self.Node(val)
+        held = self._root_lock
+        held.acquire()
+        try:
+            if self.root is None:
+                self.root = node
+                return
+            current = self.root
+            current.lock.acquire()
+            held.release()
+            held = current.lock
+            while True:
+                if val < current.val:
+                    child = current.left
+                    if child is None:
+                        current.left = node
+                        return
+                else:
+                    child = current.right
+                    if child is None:
+                        current.right = node
+                        return
+                child.lock.acquire()
+                held.release()
+                held = child.lock
+                current = child
+        finally:
+            held.release()
+
+    def exist(self, val)->bool:
+        held = self._root_lock
+        held.acquire()
+        try:
+            current = self.root
+            while current is not None:
+                current.lock.acquire()
+                held.release()
+                held = current.lock
+                if current.val == val:
+                    return True
+                current = current.left if val < current.val else current.right
+            return False
+        finally:
+            held.release()
+
+
 # tree = BST()
 # tree.insert(10)
 # tree.insert(12)
@@ -1,3 +1,6 @@
+import re
+
+
 class Trie(object):
     def __init__(self):
         self.root = self.Node(None)
@@ -8,6 +11,8 @@ class Trie(object):
             self.children = {}
             self.is_end = is_end
             self.contacts = []
+            # contacts stored in this subtree, this node included
+            self.count = 0
 
         def has_child(self, char: str)->bool:
             return char in self.children
@@ -41,12 +46,14 @@ class Trie(object):
 
     @classmethod
     def _insert(cls, root: Node, word: str, contact):
+        root.count += 1
         char = word[0]
         if not root.has_child(char):
             root.add_child(char)
         if len(word) == 1:
             end_node = root.get_child(char)
             end_node.is_end = True
+            end_node.count += 1
             end_node.contacts.append(contact)
             return
         cls._insert(root.get_child(char), word[1:], contact)
@@ -57,20 +64,57 @@ class Trie(object):
         self._remove(self.root, word)
 
     @classmethod
-    def _remove(cls, root: Node, word: str):
+    def _remove(cls, root: Node, word: str)->int:
+        """Number of contacts removed"""
         char = word[0]
         child = root.get_child(char)
         if child is None:
-            return
+            return 0
         if len(word) == 1:
+            removed = len(child.contacts)
             child.is_end = False
+            child.contacts = []
+            child.count -= removed
+        else:
+            removed = cls._remove(child, word[1:])
+        root.count -= removed
+        if not child.has_any and not child.is_end:
+            root.remove_child(char)
+        return removed
+
+    def discard(self, word: str, contact):
+        """Remove one contact stored under word, the word goes with its last contact"""
+        if word is None or word == '':
+            return
+        self._discard(self.root, word, contact)
+
+    @classmethod
+    def _discard(cls, root: Node, word: str, contact)->int:
+        char = word[0]
+        child = root.get_child(char)
+        if child is None:
+            return 0
+        if len(word) == 1:
+            if contact not in child.contacts:
+                return 0
+            child.contacts.remove(contact)
+            child.is_end = len(child.contacts) != 0
+            child.count -= 1
+            removed = 1
         else:
-            cls._remove(child, word[1:])
+            removed = cls._discard(child, word[1:], contact)
+        root.count -= removed
         if not child.has_any and not child.is_end:
             root.remove_child(char)
+        return removed
 
     def count_words(self)->int:
-        return sum([len(node.contacts) for node in self._traverse_pre(self.root) if node.is_end])
+        return self.root.count
+
+    def count_prefix(self, prefix: str)->int:
+        """Number of contacts whose word starts with prefix"""
+        root = self.chase(prefix)
+        return 0 if root is None else root.count
 
     def longest_common_prefix(self, prefix: str = ''):
         longest_prefix = ['']
@@ -79,10 +123,15 @@ class Trie(object):
 
     @classmethod
     def lcp(cls, root: Node, longest_prefix: [str], prefix: str = ''):
-        if root.is_end and root.has_any and len(prefix) > len(longest_prefix[0]):
-            longest_prefix[0] = prefix
-        for node in root.get_children():
-            cls.lcp(node, longest_prefix, prefix + node.char)
+        stack = [(root, prefix)]
+        while stack:
+            root, prefix = stack.pop()
+            if root.is_end and root.has_any and len(prefix) > len(longest_prefix[0]):
+                longest_prefix[0] = prefix
+            # a word with words below it needs a subtree of two or more contacts
+            for node in reversed(root.children.values()):
+                if node.count > 1:
+                    stack.append((node, prefix + node.char))
 
     @classmethod
     def _contains(cls, root: Node, word: str)->bool:
@@ -159,12 +208,95 @@ class Contact(object):
 
 
 class ContactList(object):
-    def __init__(self):
+    INDEXES = ('surname', 'phone', 'address')
+
+    def __init__(self, indexes=INDEXES):
+        """Contacts are always indexed by name, indexes picks the secondary ones:
+        surname prefixes, phone prefixes and suffixes, address tokens"""
+        for index in indexes:
+            if index not in self.INDEXES:
+                raise ValueError(f'Unknown index: {index}')
         self._trie = Trie()
+        self._surnames = Trie() if 'surname' in indexes else None
+        self._phones = Trie() if 'phone' in indexes else None
+        # reversed numbers, so a suffix lookup is a prefix lookup
+        self._phone_suffixes = Trie() if 'phone' in indexes else None
+        self._address_tokens = {} if 'address' in indexes else None
 
     def add(self, phone: str, name: str, surname: str = '', address: str = ''):
         contact = Contact(phone, name, surname, address)
         self._trie.insert(name, contact)
+        if self._surnames is not None and surname:
+            self._surnames.insert(surname, contact)
+        if self._phones is not None and phone:
+            self._phones.insert(phone, contact)
+            self._phone_suffixes.insert(phone[::-1], contact)
+        if self._address_tokens is not None:
+            for token in self._tokens(address):
+                self._address_tokens.setdefault(token, []).append(contact)
+
+    @staticmethod
+    def _tokens(address: str)->set:
+        return set(re.findall(r'\w+', address.lower())) if address else set()
+
+    def find(self, name: str = None, surname: str = None, phone: str = None, phone_suffix: str = None,
+             address: str = None)->[Contact]:
+        """Contacts matching every given field: name, surname and phone by prefix,
+        phone_suffix by suffix, address by containing all of its words. None and
+        empty fields match everyone. The smallest indexed candidate set is
+        fetched, the other fields filter it."""
+        # (estimated candidates, fetch them, predicate) for every given field
+        fields = []
+        if name:
+            fields.append((self._trie.count_prefix(name), lambda: self._trie.autocomplete(name),
+                           lambda contact: contact.name.startswith(name)))
+        if surname:
+            fields.append(self._prefix_field(self._surnames, surname,
+                                             lambda contact: contact.surname.startswith(surname)))
+        if phone:
+            fields.append(self._prefix_field(self._phones, phone,
+                                             lambda contact: contact.phone.startswith(phone)))
+        if phone_suffix:
+            fields.append(self._prefix_field(self._phone_suffixes, phone_suffix[::-1],
+                                             lambda contact: contact.phone.endswith(phone_suffix)))
+        if address:
+            tokens = self._tokens(address)
+            fields.append(self._address_field(tokens))
+        if not fields:
+            return self.get_all()
+
+        fields.sort(key=lambda field: field[0])
+        _, fetch, _ = fields[0]
+        candidates = fetch() if fetch is not None else self.get_all()
+        # every field is checked, an index may only narrow its field down
+        predicates = [predicate for _, _, predicate in fields]
+        return [contact for contact in candidates if all(predicate(contact) for predicate in predicates)]
+
+    @staticmethod
+    def _prefix_field(index: Trie, prefix: str, predicate)->tuple:
+        if index is None:
+            return float('inf'), None, predicate
+        return index.count_prefix(prefix), lambda: index.autocomplete(prefix), predicate
+
+    def _address_field(self, tokens: set)->tuple:
+        def predicate(contact: Contact)->bool:
+            return tokens <= self._tokens(contact.address)
+
+        if self._address_tokens is None:
+            return float('inf'), None, predicate
+        if not tokens:
+            return float('inf'), None, lambda contact: True
+        postings = sorted((self._address_tokens.get(token, []) for token in tokens), key=len)
+
+        def fetch()->[Contact]:
+            # intersect the posting lists, rarest word first
+            candidates = postings[0]
+            for contacts in postings[1:]:
+                ids = set(map(id, contacts))
+                candidates = [contact for contact in candidates if id(contact) in ids]
+            return candidates
+
+        return len(postings[0]), fetch, predicate
 
     def suggest(self, prefix: str)->[Contact]:
         return self._trie.autocomplete(prefix)
@@ -173,8 +305,25 @@ class ContactList(object):
         return self._trie.count_words()
 
     def remove(self, name: str):
+        node = self._trie.chase(name)
+        if node is not None and node.is_end:
+            for contact in node.contacts:
+                self._unindex(contact)
         self._trie.remove(name)
 
+    def _unindex(self, contact: Contact):
+        if self._surnames is not None and contact.surname:
+            self._surnames.discard(contact.surname, contact)
+        if self._phones is not None and contact.phone:
+            self._phones.discard(contact.phone, contact)
+            self._phone_suffixes.discard(contact.phone[::-1], contact)
+        if self._address_tokens is not None:
+            for token in self._tokens(contact.address):
+                contacts = self._address_tokens[token]
+                contacts.remove(contact)
+                if not contacts:
+                    del self._address_tokens[token]
+
     def get_all(self):
         return self._trie.autocomplete('')
 
@@ -182,18 +331,27 @@ class ContactList(object):
         return item in self._trie
 
 
-contact_list = ContactList()
-contact_list.add('89162342277', 'oliver', 'james')
-contact_list.add('89163214576', 'jack', 'john')
-contact_list.add('89565511573', 'harry', 'robbert')
-contact_list.add('89162342277', 'jacob', 'michael')
-contact_list.add('89163214576', 'tom', 'jerry')
-contact_list.add('89162342277', 'nu', 'pogodi')
-contact_list.add('89163214576', 'oscar', 'johnson')
-contact_list.add('89162342277', 'george', 'williams')
-contact_list.add('89993219856', 'quentin', 'tarantino')
-contact_list.add('89162342277', 'mobi', 'dick')
-contact_list.add('89993214354', 'jack', 'daniels')
-
-print(contact_list.count())
+if __name__ == '__main__':
+    contact_list = ContactList()
+    contact_list.add('89162342277', 'oliver', 'james')
+    contact_list.add('89163214576', 'jack', 'john')
+    contact_list.add('89565511573', 'harry', 'robbert')
+    contact_list.add('89162342277', 'jacob', 'michael')
+    contact_list.add('89163214576', 'tom', 'jerry')
+    contact_list.add('89162342277', 'nu', 'pogodi')
+    contact_list.add('89163214576', 'oscar', 'johnson')
+    contact_list.add('89162342277', 'george', 'williams')
+    contact_list.add('89993219856', 'quentin', 'tarantino')
+    contact_list.add('89162342277', 'mobi', 'dick')
+    contact_list.add('89993214354', 'jack', 'daniels')
+
+    print(contact_list.count())
+    print(contact_list.find(phone_suffix='4576', surname='j'))
+
+    streets = ContactList()
+    streets.add('1', 'ann', address='1 Main Street')
+    streets.add('2', 'bob', address='9 Elm Road')
+    # every word of the address has to match, not only the rarest one
+    assert streets.find(address='main road') == []
+    assert [contact.name for contact in streets.find(address='main street')] == ['ann']
 
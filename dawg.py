@@ -0,0 +1,137 @@
+class DAWG(object):
+    """Minimal acyclic automaton of a word set (Daciuk et al. incremental
+    construction). Words must come in sorted order, then every finished
+    subtree is merged with an equal one seen before, so shared suffixes
+    are stored once. Memory beyond the automaton is the register of
+    distinct nodes and the path of the last word."""
+    def __init__(self, words=None):
+        """Build from words and finish, or start empty for insert and finish"""
+        self.root = self.Node()
+        self._count = 0
+        self._previous = ''
+        # (parent, char, child) along the last word, not minimized yet
+        self._unchecked = []
+        self._register = {}
+        self._finished = False
+        if words is not None:
+            for word in words:
+                self.insert(word)
+            self.finish()
+
+    class Node(object):
+        __slots__ = ('children', 'is_end', 'count')
+
+        def __init__(self):
+            self.children = {}
+            self.is_end = False
+            # words below this node, this node included
+            self.count = 0
+
+        def key(self)->tuple:
+            # children are already minimized, so their identity stands for their subtree
+            return self.is_end, tuple([(char, id(child)) for char, child in self.children.items()])
+
+        def get_children(self)->[]:
+            return self.children.values()
+
+        def __str__(self):
+            return f'<Node: {"".join(self.children)}>'
+
+        def __repr__(self):
+            return str(self)
+
+    def insert(self, word: str):
+        """Add the next word, it must sort after every word added so far"""
+        if self._finished:
+            raise ValueError('DAWG is finished')
+        if word is None or word == '' or word == self._previous:
+            return
+        if word < self._previous:
+            raise ValueError(f'Words must be inserted in sorted order: `{word}` after `{self._previous}`')
+        common = 0
+        for char, other in zip(word, self._previous):
+            if char != other:
+                break
+            common += 1
+        self._minimize(common)
+
+        # nodes on the unchecked path are not shared, so their counts can change
+        self.root.count += 1
+        for _, _, node in self._unchecked:
+            node.count += 1
+        node = self._unchecked[-1][2] if self._unchecked else self.root
+        for char in word[common:]:
+            child = self.Node()
+            child.count = 1
+            node.children[char] = child
+            self._unchecked.append((node, char, child))
+            node = child
+        node.is_end = True
+        self._previous = word
+        self._count += 1
+
+    def finish(self):
+        """Minimize the last word, no more words can be added after it"""
+        self._minimize(0)
+        self._register = {}
+        self._finished = True
+
+    def _minimize(self, depth: int):
+        unchecked, register = self._unchecked, self._register
+        while len(unchecked) > depth:
+            parent, char, child = unchecked.pop()
+            key = child.key()
+            same = register.get(key)
+            if same is None:
+                register[key] = child
+            else:
+                parent.children[char] = same
+
+    def __contains__(self, word)->bool:
+        if word is None or len(word) == 0:
+            return False
+        node = self.chase(word)
+        return node is not None and node.is_end
+
+    def chase(self, prefix: str):
+        if prefix is None:
+            return None
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
+
+    def autocomplete(self, prefix: str)->[str]:
+        node = self.chase(prefix)
+        words = []
+        if node is None:
+            return words
+        stack = [(node, prefix)]
+        while stack:
+            node, path = stack.pop()
+            if node.is_end:
+                words.append(path)
+            for char, child in reversed(node.children.items()):
+                stack.append((child, path + char))
+        return words
+
+    def count_words(self)->int:
+        return self._count
+
+    def count_prefix(self, prefix: str)->int:
+        """Number of words starting with prefix"""
+        node = self.chase(prefix)
+        return 0 if node is None else node.count
+
+    def count_nodes(self)->int:
+        """Distinct nodes, shared ones counted once"""
+        seen = {id(self.root)}
+        stack = [self.root]
+        while stack:
+            for child in stack.pop().get_children():
+                if id(child) not in seen:
+                    seen.add(id(child))
+                    stack.append(child)
+        return len(seen)
@@ -0,0 +1,163 @@
+import array
+import mmap
+import struct
+import sys
+
+# magic, cell count, word count, byte order (0 little, 1 big)
+HEADER = struct.Struct('<4sIII')
+MAGIC = b'DAT1'
+# transitions use utf-8 byte + 1, code 0 marks the end of a word
+END = 0
+ALPHABET = 257
+
+
+def compile_trie(source, path: str):
+    """Write a trie (Trie or RadixTrie from prefix_tree, trie_array.Trie, dawg.DAWG)
+    or an iterable of words to path as a double-array (BASE/CHECK) file that
+    DoubleArrayTrie maps directly"""
+    keys = sorted({word.encode('utf-8') for word in _words(source) if word})
+    base, check = _build(keys)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(base), len(keys), sys.byteorder == 'big'))
+        base.tofile(f)
+        check.tofile(f)
+
+
+def _words(source):
+    # every trie here lists all of its words with autocomplete('')
+    if hasattr(source, 'autocomplete'):
+        return source.autocomplete('')
+    return source
+
+
+def _build(keys: list)->(array.array, array.array):
+    """Lay out the trie of sorted unique byte strings, state 0 is the root"""
+    base = array.array('i', [0])
+    # the root has no parent, base is never 0 so no transition lands on it
+    check = array.array('i', [-1])
+    next_free = 1
+    stack = [(0, 0, len(keys), 0)] if keys else []
+    while stack:
+        state, lo, hi, depth = stack.pop()
+        codes, ranges = [], []
+        i = lo
+        if len(keys[i]) == depth:
+            # sorted, so only the first key can end here
+            codes.append(END)
+            ranges.append((i, i + 1))
+            i += 1
+        while i < hi:
+            code = keys[i][depth] + 1
+            j = i + 1
+            while j < hi and keys[j][depth] + 1 == code:
+                j += 1
+            codes.append(code)
+            ranges.append((i, j))
+            i = j
+
+        # first fit, every child slot base + code must be free
+        b = max(1, next_free - codes[0])
+        while True:
+            size = len(check)
+            if all(b + code >= size or check[b + code] < 0 for code in codes):
+                break
+            b += 1
+        top = b + codes[-1] + 1
+        if top > len(check):
+            grow = max(top - len(check), len(check))
+            base.extend([0] * grow)
+            check.extend([-1] * grow)
+        base[state] = b
+        for code, (l, h) in zip(codes, ranges):
+            check[b + code] = state
+            if code != END:
+                stack.append((b + code, l, h, depth + 1))
+        while next_free < len(check) and check[next_free] >= 0:
+            next_free += 1
+
+    used = len(check)
+    while used > 1 and check[used - 1] < 0:
+        used -= 1
+    return base[:used], check[:used]
+
+
+class DoubleArrayTrie(object):
+    """Read-only trie served straight from a mmap'ed compile_trie file, nothing is
+    deserialized so processes start instantly and share the mapped pages"""
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, cells, self._count, big_endian = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError(f'Not a double-array trie file: {path}')
+        if bool(big_endian) != (sys.byteorder == 'big'):
+            self._mmap.close()
+            raise ValueError('File was written with another byte order')
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self._base = view[offset:offset + 4 * cells].cast('i')
+        self._check = view[offset + 4 * cells:offset + 8 * cells].cast('i')
+        view.release()
+
+    def _next(self, state: int, code: int):
+        target = self._base[state] + code
+        if target < len(self._check) and self._check[target] == state:
+            return target
+        return None
+
+    def __contains__(self, word)->bool:
+        if word is None or len(word) == 0:
+            return False
+        state = self.chase(word)
+        return state is not None and self._next(state, END) is not None
+
+    def chase(self, prefix: str):
+        """State reached by prefix, None if no word starts with it"""
+        base, check = self._base, self._check
+        size = len(check)
+        state = 0
+        for byte in prefix.encode('utf-8'):
+            target = base[state] + byte + 1
+            if target >= size or check[target] != state:
+                return None
+            state = target
+        return state
+
+    def autocomplete(self, prefix: str)->[str]:
+        state = self.chase(prefix)
+        words = []
+        if state is None:
+            return words
+        base, check = self._base, self._check
+        size = len(check)
+        stack = [(state, prefix.encode('utf-8'))]
+        while stack:
+            state, path = stack.pop()
+            first = base[state]
+            children = []
+            for code in range(ALPHABET):
+                target = first + code
+                if target >= size:
+                    break
+                if check[target] == state:
+                    if code == END:
+                        words.append(path.decode('utf-8'))
+                    else:
+                        children.append((target, path + bytes((code - 1,))))
+            stack.extend(reversed(children))
+        return words
+
+    def count_words(self)->int:
+        return self._count
+
+    def close(self):
+        self._base.release()
+        self._check.release()
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
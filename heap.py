@@ -1,3 +1,12 @@
+import array
+import operator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
 class Heap(object):
     def __init__(self, capacity: int, arr: list = None, is_max: bool = True):
         self.size = 0
@@ -15,8 +24,7 @@ class Heap(object):
         self._items = [None] * capacity
 
     def insert(self, val):
-        if self.is_full:
-            raise ValueError('Space overflowed')
+        self._reserve(self.size + 1)
         self._items[self.size] = val
         self.size += 1
         if self.is_max:
@@ -31,12 +39,74 @@ class Heap(object):
         root = self._items[0]
         self.size -= 1
         self._items[0] = self._items[self.size]
-        p = 0
+        self._items[self.size] = None
+        self.push_down(0)
+        return root
+
+    def push_many(self, iterable):
+        batch = list(iterable)
+        start = self.size
+        self._reserve(start + len(batch))
+        self._items[start:start + len(batch)] = batch
+        self.size += len(batch)
+        if len(batch) * self.size.bit_length() > self.size:
+            # a bottom-up rebuild is O(n) and beats k sift-ups of O(log n)
+            Heap.heapify(self._items, self.is_max, self.size)
+            self._reindex()
+            return
+        for i in range(start, self.size):
+            if self.is_max:
+                self.bubble_up(i)
+            else:
+                self.bubble_down(i)
+
+    def pop_many(self, k: int)->list:
+        return [self.remove() for _ in range(min(k, self.size))]
+
+    def merge(self, other):
+        """Add the items of other in O(n + m), other is left unchanged"""
+        if other.is_max != self.is_max:
+            raise ValueError('Heaps have different order')
+        items = other._items[:other.size]
+        self._reserve(self.size + len(items))
+        self._items[self.size:self.size + len(items)] = items
+        self.size += len(items)
+        Heap.heapify(self._items, self.is_max, self.size)
+        self._reindex()
+
+    @staticmethod
+    def top_k(iterable, k: int, is_max: bool = True)->list:
+        """The k largest (smallest when not is_max) items of a stream, best first.
+        Only k items are held, the worst kept one sits on top of an opposite heap."""
+        if k <= 0:
+            return []
+        heap = Heap(min(k, 16), is_max=not is_max)
+        items = heap.items
+        for val in iterable:
+            if heap.size < k:
+                if heap.is_full:
+                    # double up to k, a short stream never allocates k slots
+                    items.extend([None] * min(heap.size, k - heap.size))
+                heap.insert(val)
+            elif val > items[0] if is_max else val < items[0]:
+                items[0] = val
+                heap.push_down(0)
+        result = heap.pop_many(k)
+        result.reverse()
+        return result
+
+    def _reindex(self):
+        pass
+
+    def push_down(self, p: int):
         while p <= self.size and not self.valid_parent(p):
             i = self.next_child_i(p)
             self.swap(i, p)
             p = i
-        return root
+
+    def _reserve(self, size: int):
+        if size > len(self._items):
+            raise ValueError('Space overflowed')
 
     def valid_parent(self, p: int)->bool:
         if not self.has_left_child(p):
@@ -49,14 +119,16 @@ class Heap(object):
             return self._items[p] < self.left_child(p)
         return self._items[p] < self.left_child(p) and self._items[p] < self.right_child(p)
 
-    def bubble_up(self):
-        index = self.size - 1
+    def bubble_up(self, index: int = None):
+        if index is None:
+            index = self.size - 1
         while index > 0 and self._items[index] > self._items[Heap.parent(index)]:
             self.swap(index, Heap.parent(index))
             index = Heap.parent(index)
 
-    def bubble_down(self):
-        index = self.size - 1
+    def bubble_down(self, index: int = None):
+        if index is None:
+            index = self.size - 1
         while index > 0 and self._items[index] < self._items[Heap.parent(index)]:
             self.swap(index, Heap.parent(index))
             index = Heap.parent(index)
@@ -83,31 +155,34 @@ class Heap(object):
         return self.right_i(p) < self.size
 
     @staticmethod
-    def heapify(arr: list, is_max: bool)->list:
-        for i in range(len(arr)//2 - 1, -1, -1):
-            Heap._heapify(arr, i, is_max)
+    def heapify(arr: list, is_max: bool, size: int = None)->list:
+        """Heapify arr in place, or only its first size items"""
+        size = len(arr) if size is None else size
+        for i in range(size//2 - 1, -1, -1):
+            Heap._heapify(arr, i, is_max, size)
         return arr
 
     @staticmethod
-    def _heapify(arr: list, i: int, is_max: bool):
+    def _heapify(arr: list, i: int, is_max: bool, size: int = None):
+        size = len(arr) if size is None else size
         index = i
         left = i * 2 + 1
         right = i * 2 + 2
         if is_max:
-            if left < len(arr) and arr[left] > arr[index]:
+            if left < size and arr[left] > arr[index]:
                 index = left
-            if right < len(arr) and arr[right] > arr[index]:
+            if right < size and arr[right] > arr[index]:
                 index = right
         else:
-            if left < len(arr) and arr[left] < arr[index]:
+            if left < size and arr[left] < arr[index]:
                 index = left
-            if right < len(arr) and arr[right] < arr[index]:
+            if right < size and arr[right] < arr[index]:
                 index = right
         if index == i:
             return
         # swap
         arr[i], arr[index] = arr[index], arr[i]
-        Heap._heapify(arr, index, is_max)
+        Heap._heapify(arr, index, is_max, size)
 
     @staticmethod
     def left_i(p: int)->int:
@@ -142,3 +217,582 @@ class Heap(object):
     def __repr__(self):
         return str(self)
 
+
+class IndexedHeap(Heap):
+    """Growable heap of prioritized items. push returns a handle that
+    update and remove take to change or drop its entry in O(log n)."""
+    class Entry(object):
+        __slots__ = ('item', 'priority', 'index')
+
+        def __init__(self, item, priority, index: int):
+            self.item = item
+            self.priority = priority
+            self.index = index
+
+        def __lt__(self, other):
+            return self.priority < other.priority
+
+        def __le__(self, other):
+            return self.priority <= other.priority
+
+        def __gt__(self, other):
+            return self.priority > other.priority
+
+        def __ge__(self, other):
+            return self.priority >= other.priority
+
+        def __str__(self):
+            return f'<{self.__class__.__name__}: {self.item}={self.priority}>'
+
+        def __repr__(self):
+            return str(self)
+
+    def __init__(self, capacity: int = 16, is_max: bool = True):
+        super().__init__(max(capacity, 1), is_max=is_max)
+
+    def push(self, item, priority)->Entry:
+        entry = self.Entry(item, priority, self.size)
+        self.insert(entry)
+        return entry
+
+    def push_many(self, pairs)->[Entry]:
+        """Push (item, priority) pairs, returns their handles"""
+        entries = [self.Entry(item, priority, self.size + i) for i, (item, priority) in enumerate(pairs)]
+        super().push_many(entries)
+        return entries
+
+    def merge(self, other):
+        """Move the entries of other here, their handles stay valid and other is emptied"""
+        super().merge(other)
+        other._items = [None] * len(other._items)
+        other.size = 0
+
+    def update(self, handle: Entry, priority):
+        self._check(handle)
+        handle.priority = priority
+        self._restore(handle.index)
+
+    def remove(self, handle: Entry = None)->Entry:
+        """Remove the entry of handle, or the root entry when no handle is given"""
+        if handle is None:
+            if self.is_empty:
+                raise IndexError("Empty heap")
+            handle = self._items[0]
+        self._check(handle)
+        i = handle.index
+        self.size -= 1
+        last = self._items[self.size]
+        self._items[self.size] = None
+        if i != self.size:
+            self._items[i] = last
+            last.index = i
+            self._restore(i)
+        handle.index = -1
+        return handle
+
+    def peek(self)->Entry:
+        if self.is_empty:
+            raise IndexError("Empty heap")
+        return self._items[0]
+
+    def _restore(self, i: int):
+        if i > 0 and self.is_max and self._items[i] > self._items[Heap.parent(i)]:
+            self.bubble_up(i)
+        elif i > 0 and not self.is_max and self._items[i] < self._items[Heap.parent(i)]:
+            self.bubble_down(i)
+        else:
+            self.push_down(i)
+
+    def _reindex(self):
+        for i in range(self.size):
+            self._items[i].index = i
+
+    def _check(self, handle: Entry):
+        if not 0 <= handle.index < self.size or self._items[handle.index] is not handle:
+            raise ValueError('Stale handle')
+
+    def _reserve(self, size: int):
+        # grow geometrically
+        if size > len(self._items):
+            self._items.extend([None] * max(size - len(self._items), len(self._items)))
+
+    def swap(self, i, p):
+        items = self._items
+        items[i], items[p] = items[p], items[i]
+        items[i].index = i
+        items[p].index = p
+
+
+class PairingHeap(object):
+    """Mergeable heap with the Heap API. insert and meld are O(1), remove is
+    amortized O(log n). insert returns the node as a handle for update and remove."""
+    class Node(object):
+        __slots__ = ('val', 'child', 'sibling', 'prev')
+
+        def __init__(self, val):
+            self.val = val
+            self.child = None
+            self.sibling = None
+            # parent for the leftmost child, left sibling otherwise
+            self.prev = None
+
+        def __str__(self):
+            return f'<{self.__class__.__name__}: {self.val}>'
+
+        def __repr__(self):
+            return str(self)
+
+    def __init__(self, capacity: int = None, arr: list = None, is_max: bool = True):
+        """Same arguments as Heap so the two can be swapped, capacity is not
+        needed as nodes are allocated one by one and is ignored"""
+        self.root = None
+        self.size = 0
+        self.is_max = is_max
+        if arr is not None:
+            self.push_many(arr)
+
+    def insert(self, val)->Node:
+        node = self.Node(val)
+        self.root = self._link(self.root, node)
+        self.size += 1
+        return node
+
+    def push_many(self, iterable)->[Node]:
+        return [self.insert(val) for val in iterable]
+
+    def meld(self, other):
+        """Take over all nodes of other in O(1), other is left empty"""
+        if other.is_max != self.is_max:
+            raise ValueError('Heaps have different order')
+        self.root = self._link(self.root, other.root)
+        self.size += other.size
+        other.root = None
+        other.size = 0
+
+    def merge(self, other):
+        """Add copies of the items of other in O(m) like Heap.merge, other is left unchanged"""
+        if other.is_max != self.is_max:
+            raise ValueError('Heaps have different order')
+        self.push_many(other.items)
+
+    def peek(self):
+        if self.is_empty:
+            raise IndexError("Empty heap")
+        return self.root.val
+
+    def remove(self, handle: Node = None):
+        """Remove the node of handle, or the root when no handle is given"""
+        if handle is None:
+            if self.is_empty:
+                raise IndexError("Empty heap")
+            handle = self.root
+        self._check(handle)
+        if handle is self.root:
+            self.root = self._merge_pairs(handle.child)
+        else:
+            self._cut(handle)
+            self.root = self._link(self.root, self._merge_pairs(handle.child))
+        handle.child = None
+        self.size -= 1
+        return handle.val
+
+    def pop_many(self, k: int)->list:
+        return [self.remove() for _ in range(min(k, self.size))]
+
+    def update(self, handle: Node, val):
+        self._check(handle)
+        improves = val >= handle.val if self.is_max else val <= handle.val
+        if improves:
+            # decrease-key, cut the subtree and link it back at the top
+            handle.val = val
+            if handle is not self.root:
+                self._cut(handle)
+                self.root = self._link(self.root, handle)
+            return
+        if handle is self.root:
+            self.root = self._merge_pairs(handle.child)
+        else:
+            self._cut(handle)
+            self.root = self._link(self.root, self._merge_pairs(handle.child))
+        handle.child = None
+        handle.val = val
+        self.root = self._link(self.root, handle)
+
+    def _check(self, handle: Node):
+        if handle is not self.root and handle.prev is None:
+            raise ValueError('Stale handle')
+
+    def _link(self, a: Node, b: Node)->Node:
+        """Link two detached roots, the loser becomes the leftmost child"""
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if b.val > a.val if self.is_max else b.val < a.val:
+            a, b = b, a
+        b.prev = a
+        b.sibling = a.child
+        if a.child is not None:
+            a.child.prev = b
+        a.child = b
+        return a
+
+    @staticmethod
+    def _cut(node: Node):
+        prev = node.prev
+        if prev.child is node:
+            prev.child = node.sibling
+        else:
+            prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = prev
+        node.prev = None
+        node.sibling = None
+
+    def _merge_pairs(self, first: Node)->Node:
+        # two-pass pairing: link neighbours left to right, then fold right to left
+        pairs = []
+        while first is not None:
+            second = first.sibling
+            following = None if second is None else second.sibling
+            first.sibling = first.prev = None
+            if second is not None:
+                second.sibling = second.prev = None
+            pairs.append(self._link(first, second))
+            first = following
+        root = None
+        for node in reversed(pairs):
+            root = self._link(node, root)
+        return root
+
+    @property
+    def is_full(self):
+        return False
+
+    @property
+    def is_empty(self):
+        return self.root is None
+
+    @property
+    def items(self)->list:
+        items = []
+        stack = [] if self.root is None else [self.root]
+        while stack:
+            node = stack.pop()
+            items.append(node.val)
+            if node.sibling is not None:
+                stack.append(node.sibling)
+            if node.child is not None:
+                stack.append(node.child)
+        return items
+
+    def __len__(self):
+        return self.size
+
+    def __str__(self):
+        return f'<{self.__class__.__name__}: {str(self.items)}>'
+
+    def __repr__(self):
+        return str(self)
+
+
+class DaryHeap(object):
+    """Growable d-ary heap. Priorities come from key, computed once per item
+    and kept in a list parallel to the items. The sift loops are specialized
+    for min and max so no level pays for a method call or the is_max branch."""
+    def __init__(self, arity: int = 4, key=None, is_max: bool = True, arr: list = None):
+        if arity not in (2, 4, 8):
+            raise ValueError(f'Unsupported arity: {arity}')
+        self.arity = arity
+        self.key = key
+        self.is_max = is_max
+        if is_max:
+            self._sift_up, self._sift_down = self._sift_up_max, self._sift_down_max
+        else:
+            self._sift_up, self._sift_down = self._sift_up_min, self._sift_down_min
+        self._items = list(arr) if arr is not None else []
+        self._keys = self._items[:] if key is None else [key(item) for item in self._items]
+        for i in range((len(self._items) - 2) // arity, -1, -1):
+            self._sift_down(i)
+
+    def insert(self, val):
+        self._keys.append(val if self.key is None else self.key(val))
+        self._items.append(val)
+        self._sift_up(len(self._keys) - 1)
+
+    def remove(self):
+        keys, items = self._keys, self._items
+        if not keys:
+            raise IndexError("Empty heap")
+        root = items[0]
+        key, item = keys.pop(), items.pop()
+        if keys:
+            keys[0], items[0] = key, item
+            self._sift_down(0)
+        return root
+
+    def peek(self):
+        if not self._keys:
+            raise IndexError("Empty heap")
+        return self._items[0]
+
+    def _sift_up_max(self, i: int):
+        keys, items, d = self._keys, self._items, self.arity
+        key, item = keys[i], items[i]
+        while i > 0:
+            p = (i - 1) // d
+            if not key > keys[p]:
+                break
+            keys[i], items[i] = keys[p], items[p]
+            i = p
+        keys[i], items[i] = key, item
+
+    def _sift_up_min(self, i: int):
+        keys, items, d = self._keys, self._items, self.arity
+        key, item = keys[i], items[i]
+        while i > 0:
+            p = (i - 1) // d
+            if not key < keys[p]:
+                break
+            keys[i], items[i] = keys[p], items[p]
+            i = p
+        keys[i], items[i] = key, item
+
+    def _sift_down_max(self, i: int):
+        keys, items, d = self._keys, self._items, self.arity
+        n = len(keys)
+        key, item = keys[i], items[i]
+        while True:
+            first = d * i + 1
+            if first >= n:
+                break
+            last = first + d
+            if last > n:
+                last = n
+            best, best_key = first, keys[first]
+            for c in range(first + 1, last):
+                if keys[c] > best_key:
+                    best, best_key = c, keys[c]
+            if not best_key > key:
+                break
+            keys[i], items[i] = best_key, items[best]
+            i = best
+        keys[i], items[i] = key, item
+
+    def _sift_down_min(self, i: int):
+        keys, items, d = self._keys, self._items, self.arity
+        n = len(keys)
+        key, item = keys[i], items[i]
+        while True:
+            first = d * i + 1
+            if first >= n:
+                break
+            last = first + d
+            if last > n:
+                last = n
+            best, best_key = first, keys[first]
+            for c in range(first + 1, last):
+                if keys[c] < best_key:
+                    best, best_key = c, keys[c]
+            if not best_key < key:
+                break
+            keys[i], items[i] = best_key, items[best]
+            i = best
+        keys[i], items[i] = key, item
+
+    @property
+    def size(self)->int:
+        return len(self._keys)
+
+    @property
+    def is_empty(self):
+        return not self._keys
+
+    @property
+    def items(self):
+        return self._items
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __str__(self):
+        return f'<{self.__class__.__name__}: {str(self._items)}>'
+
+    def __repr__(self):
+        return str(self)
+
+
+class NumericHeap(object):
+    """Heap of int or float priorities packed in an array.array, with an optional
+    parallel array of integer payload ids. A max heap stores flipped priorities,
+    negated floats and bitwise inverted ints, which can not overflow the typecode.
+    Bulk builds heapify level by level with vectorized compare/swap when numpy
+    is installed."""
+    def __init__(self, values=(), ids=None, typecode: str = 'd', is_max: bool = False):
+        if typecode not in ('b', 'h', 'i', 'l', 'q', 'f', 'd'):
+            raise ValueError(f'Unsupported typecode: {typecode}')
+        self.is_max = is_max
+        self._flip = operator.neg if typecode in ('f', 'd') else operator.invert
+        self._values = array.array(typecode)
+        self._ids = None if ids is None else array.array('q')
+        self.push_many(values, ids)
+
+    def insert(self, priority, payload_id: int = None):
+        if (payload_id is None) != (self._ids is None):
+            raise ValueError('Payload ids must be given for every item or none')
+        self._values.append(self._flip(priority) if self.is_max else priority)
+        if self._ids is not None:
+            self._ids.append(payload_id)
+        self._sift_up(len(self._values) - 1)
+
+    def push_many(self, values, ids=None):
+        if (ids is None) != (self._ids is None):
+            raise ValueError('Payload ids must be given for every item or none')
+        start = len(self._values)
+        if self.is_max:
+            values = map(self._flip, values)
+        self._values.extend(values)
+        if ids is not None:
+            self._ids.extend(ids)
+            if len(self._ids) != len(self._values):
+                del self._values[start:]
+                del self._ids[start:]
+                raise ValueError('Values and ids differ in length')
+        size = len(self._values)
+        if (size - start) * size.bit_length() > size:
+            self.heapify()
+        else:
+            for i in range(start, size):
+                self._sift_up(i)
+
+    def remove(self):
+        """Pop the root priority, or (priority, payload id) when ids are kept"""
+        values, ids = self._values, self._ids
+        if not values:
+            raise IndexError("Empty heap")
+        root = self._flip(values[0]) if self.is_max else values[0]
+        root_id = None if ids is None else ids[0]
+        val = values.pop()
+        payload_id = None if ids is None else ids.pop()
+        if values:
+            values[0] = val
+            if ids is not None:
+                ids[0] = payload_id
+            self._sift_down(0)
+        return root if ids is None else (root, root_id)
+
+    def peek(self):
+        if not self._values:
+            raise IndexError("Empty heap")
+        root = self._flip(self._values[0]) if self.is_max else self._values[0]
+        return root if self._ids is None else (root, self._ids[0])
+
+    def heapify(self):
+        if np is not None:
+            self._heapify_numpy()
+            return
+        for i in range(len(self._values) // 2 - 1, -1, -1):
+            self._sift_down(i)
+
+    def _heapify_numpy(self):
+        n = len(self._values)
+        if n < 2:
+            return
+        values = np.frombuffer(self._values, dtype=self._values.typecode)
+        ids = None if self._ids is None else np.frombuffer(self._ids, dtype=np.int64)
+        last_parent = n // 2 - 1
+        # parents of one level own disjoint subtrees and sift down together
+        for level in range((last_parent + 1).bit_length() - 1, -1, -1):
+            nodes = np.arange(2 ** level - 1, min(2 ** (level + 1) - 1, last_parent + 1))
+            while nodes.size:
+                left = 2 * nodes + 1
+                inside = left < n
+                nodes, left = nodes[inside], left[inside]
+                right = left + 1
+                child = left.copy()
+                has_right = right < n
+                right = right[has_right]
+                child[has_right] = np.where(values[right] < values[left[has_right]], right, left[has_right])
+                smaller = values[child] < values[nodes]
+                nodes, child = nodes[smaller], child[smaller]
+                values[nodes], values[child] = values[child], values[nodes].copy()
+                if ids is not None:
+                    ids[nodes], ids[child] = ids[child], ids[nodes].copy()
+                nodes = child
+
+    def heapsort(self):
+        """Sort the storage in place, best priority first, and return the priorities.
+        A sorted array is still a valid heap, so the heap stays usable."""
+        values, ids = self._values, self._ids
+        if np is not None and values:
+            view = np.frombuffer(values, dtype=values.typecode)
+            order = np.argsort(view, kind='heapsort')
+            view[:] = view[order]
+            if ids is not None:
+                id_view = np.frombuffer(ids, dtype=np.int64)
+                id_view[:] = id_view[order]
+        else:
+            # classic in-place heapsort leaves a min heap descending, then flip it
+            for end in range(len(values) - 1, 0, -1):
+                values[0], values[end] = values[end], values[0]
+                if ids is not None:
+                    ids[0], ids[end] = ids[end], ids[0]
+                self._sift_down(0, end)
+            values.reverse()
+            if ids is not None:
+                ids.reverse()
+        return list(map(self._flip, values)) if self.is_max else values.tolist()
+
+    def _sift_up(self, i: int):
+        values, ids = self._values, self._ids
+        val = values[i]
+        payload_id = None if ids is None else ids[i]
+        while i > 0:
+            p = (i - 1) >> 1
+            if not val < values[p]:
+                break
+            values[i] = values[p]
+            if ids is not None:
+                ids[i] = ids[p]
+            i = p
+        values[i] = val
+        if ids is not None:
+            ids[i] = payload_id
+
+    def _sift_down(self, i: int, size: int = None):
+        values, ids = self._values, self._ids
+        n = len(values) if size is None else size
+        val = values[i]
+        payload_id = None if ids is None else ids[i]
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and values[child + 1] < values[child]:
+                child += 1
+            if not values[child] < val:
+                break
+            values[i] = values[child]
+            if ids is not None:
+                ids[i] = ids[child]
+            i = child
+        values[i] = val
+        if ids is not None:
+            ids[i] = payload_id
+
+    @property
+    def size(self)->int:
+        return len(self._values)
+
+    @property
+    def is_empty(self):
+        return not self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    def __str__(self):
+        return f'<{self.__class__.__name__}: {len(self._values)} items>'
+
+    def __repr__(self):
+        return str(self)
@@ -1,12 +1,28 @@
+import bisect
+import heapq
+import itertools
+
+
 class Trie(object):
-    def __init__(self):
+    def __init__(self, cache_size: int = 10):
+        """Every node caches the cache_size best ranked words below it"""
+        if cache_size < 1:
+            raise ValueError('cache_size must be positive')
         self.root = self.Node(None)
+        self.cache_size = cache_size
 
     class Node(object):
+        __slots__ = ('char', 'children', 'is_end', 'weight', 'top', 'count')
+
         def __init__(self, char, is_end=False):
             self.char = char
             self.children = {}
             self.is_end = is_end
+            self.weight = 0
+            # words ending in this subtree, this node included
+            self.count = 0
+            # (-weight, word) of the best words in the subtree, best first
+            self.top = ()
 
         def has_child(self, char: str)->bool:
             return char in self.children
@@ -35,39 +51,133 @@ class Trie(object):
         def __repr__(self):
             return str(self)
 
-    def insert(self, word):
-        self._insert(self.root, word)
+    def insert(self, word, weight: int = 1):
+        """Add word, inserting it again adds weight to its frequency"""
+        if word is None or word == '':
+            return
+        path = self._insert(self.root, word)
+        end = path[-1]
+        end.weight += weight
+        if weight >= 0:
+            self._promote(path, word, end.weight - weight, end.weight)
+        else:
+            self._refresh(word)
 
-    @classmethod
-    def _insert(cls, root: Node, word: str):
-        char = word[0]
-        if not root.has_child(char):
-            root.add_child(char)
-        if len(word) == 1:
-            root.get_child(char).is_end = True
+    def insert_many(self, words):
+        insert = self.insert
+        for word in words:
+            insert(word)
+
+    def set_weight(self, word, weight: int):
+        if word is None or word == '':
+            return
+        end = self.chase(word)
+        if end is None or not end.is_end:
+            self.insert(word, weight)
             return
-        cls._insert(root.get_child(char), word[1:])
+        old, end.weight = end.weight, weight
+        if weight >= old:
+            path = [self.root]
+            for char in word:
+                path.append(path[-1].children[char])
+            self._promote(path, word, old, weight)
+        else:
+            self._refresh(word)
+
+    @classmethod
+    def _insert(cls, root: Node, word: str)->[Node]:
+        """Nodes from root to the end of word"""
+        path = [root]
+        for char in word:
+            child = root.children.get(char)
+            if child is None:
+                child = root.children[char] = root.__class__(char)
+            root = child
+            path.append(root)
+        if not root.is_end:
+            root.is_end = True
+            for node in path:
+                node.count += 1
+        return path
+
+    def _promote(self, path: [Node], word: str, old: int, weight: int):
+        """Rank word higher, from old to weight, in the caches on its path, bottom up"""
+        entry, stale = (-weight, word), (-old, word)
+        # nodes holding only this word share one tuple, a cache turns into its
+        # own list when it first changes, so a long new tail allocates nothing
+        single = (entry,)
+        for node in reversed(path):
+            top = node.top
+            if len(top) == 0 or len(top) == 1 and top[0][1] == word:
+                node.top = single
+                continue
+            i = bisect.bisect_left(top, stale)
+            found = i < len(top) and top[i] == stale
+            if not found and len(top) >= self.cache_size and not entry < top[-1]:
+                # not good enough here, so not for any ancestor either
+                break
+            if type(top) is tuple:
+                top = node.top = list(top)
+            if found:
+                if i == 0 or not entry < top[i - 1]:
+                    # still in the right position
+                    top[i] = entry
+                    continue
+                del top[i]
+            elif len(top) >= self.cache_size:
+                top.pop()
+            bisect.insort(top, entry)
+
+    def _refresh(self, word: str):
+        """Rebuild the caches on the path of word from the children caches, bottom up"""
+        path = [self.root]
+        for char in word:
+            node = path[-1].children.get(char)
+            if node is None:
+                break
+            path.append(node)
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            own = [(-node.weight, word[:depth])] if node.is_end else []
+            ranked = heapq.merge(own, *(child.top for child in node.children.values()))
+            node.top = list(itertools.islice(ranked, self.cache_size))
 
     def remove(self, word):
         if word is None or word == '':
             return
+        end = self.chase(word)
+        if end is None or not end.is_end:
+            return
+        end.weight = 0
         self._remove(self.root, word)
+        self._refresh(word)
 
     @classmethod
     def _remove(cls, root: Node, word: str):
-        char = word[0]
-        child = root.get_child(char)
-        if child is None:
-            return
-        if len(word) == 1:
-            child.is_end = False
-        else:
-            cls._remove(child, word[1:])
-        if not child.has_any and not child.is_end:
-            root.remove_child(char)
+        path = []
+        for char in word:
+            path.append(root)
+            root = root.get_child(char)
+            if root is None:
+                return
+        root.is_end = False
+        root.count -= 1
+        for node in path:
+            node.count -= 1
+        # prune the nodes left without words, bottom up
+        for parent, char in zip(reversed(path), reversed(word)):
+            child = parent.children[char]
+            if child.has_any or child.is_end:
+                break
+            parent.remove_child(char)
 
     def count_words(self)->int:
-        return sum([1 for node in self._traverse_pre(self.root) if node.is_end])
+        return self.root.count
+
+    def count_prefix(self, prefix: str)->int:
+        """Number of words starting with prefix"""
+        root = self.chase(prefix)
+        return 0 if root is None else root.count
 
     def longest_common_prefix(self, prefix: str = ''):
         longest_prefix = ['']
@@ -76,34 +186,107 @@ class Trie(object):
 
     @classmethod
     def lcp(cls, root: Node, longest_prefix: [str], prefix: str = ''):
-        if root.is_end and root.has_any and len(prefix) > len(longest_prefix[0]):
-            longest_prefix[0] = prefix
-        for node in root.get_children():
-            cls.lcp(node, longest_prefix, prefix + node.char)
+        stack = [(root, prefix)]
+        while stack:
+            root, prefix = stack.pop()
+            if root.is_end and root.has_any and len(prefix) > len(longest_prefix[0]):
+                longest_prefix[0] = prefix
+            # a word with words below it needs a subtree of two or more words
+            for node in reversed(root.children.values()):
+                if node.count > 1:
+                    stack.append((node, prefix + node.char))
 
     @classmethod
     def _contains(cls, root: Node, word: str)->bool:
-        char = word[0]
-        if not root.has_child(char):
-            return False
-        if len(word) == 1:
-            return root.get_child(char).is_end
-        return cls._contains(root.get_child(char), word[1:])
+        for char in word:
+            root = root.children.get(char)
+            if root is None:
+                return False
+        return root.is_end
 
-    def autocomplete(self, prefix: str)->[str]:
+    def contains_many(self, words)->[bool]:
+        root, contains = self.root, self._contains
+        return [bool(word) and contains(root, word) for word in words]
+
+    def autocomplete(self, prefix: str, limit: int = None)->[str]:
+        """All words under prefix, or the limit best ranked ones, best first"""
+        if limit is not None and limit < 0:
+            raise ValueError('limit must not be negative')
         root = self.chase(prefix)
         words = []
         if root is None:
             return words
-        self._autocomplete(root, prefix, words)
+        if limit is None:
+            self._autocomplete(root, prefix, words)
+        elif limit <= self.cache_size:
+            words = [word for _, word in root.top[:limit]]
+        else:
+            words = list(itertools.islice(self.iter_autocomplete(prefix), limit))
         return words
 
+    def iter_autocomplete(self, prefix: str):
+        """Lazily yield the words under prefix, best ranked first. A best-first
+        search keyed on each subtree's cached top entry, so every word costs
+        O(log n) heap work no matter how many completions exist."""
+        root = self.chase(prefix)
+        if root is None or not root.top:
+            return
+        heap = [(root.top[0], 1, prefix, root)]
+        while heap:
+            key, is_node, path, node = heapq.heappop(heap)
+            if not is_node:
+                yield path
+                continue
+            if node.is_end:
+                heapq.heappush(heap, ((-node.weight, path), 0, path, None))
+            for child in node.get_children():
+                if child.top:
+                    heapq.heappush(heap, (child.top[0], 1, path + child.char, child))
+
     @classmethod
     def _autocomplete(cls, root: Node, prefix: str, words: [str]):
-        if root.is_end:
-            words.append(prefix)
-        for node in root.get_children():
-            cls._autocomplete(node, prefix + node.char, words)
+        stack = [(root, prefix)]
+        while stack:
+            root, prefix = stack.pop()
+            if root.is_end:
+                words.append(prefix)
+            for node in reversed(root.children.values()):
+                stack.append((node, prefix + node.char))
+
+    def fuzzy_search(self, word: str, max_distance: int = 1)->[(str, int)]:
+        """(word, distance) for the words within max_distance edits of word,
+        closest first, then best ranked"""
+        return self._fuzzy(word, max_distance, False)
+
+    def fuzzy_autocomplete(self, prefix: str, max_distance: int = 1)->[(str, int)]:
+        """(word, distance) for the words starting with something within
+        max_distance edits of prefix, closest first, then best ranked"""
+        return self._fuzzy(prefix, max_distance, True)
+
+    def _fuzzy(self, word: str, max_distance: int, is_prefix: bool)->[(str, int)]:
+        """Depth first walk carrying one Levenshtein row per node, a subtree is cut
+        as soon as no cell of its row is within max_distance any more"""
+        if word is None or max_distance < 0:
+            return []
+        columns = range(1, len(word) + 1)
+        first = list(range(len(word) + 1))
+        # for completions the distance is the best one seen along the path
+        stack = [(child, child.char, first, first[-1]) for child in self.root.get_children()]
+        matches = []
+        while stack:
+            node, path, previous, best = stack.pop()
+            char = node.char
+            row = [previous[0] + 1]
+            for i in columns:
+                row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (word[i - 1] != char)))
+            distance = min(best, row[-1]) if is_prefix else row[-1]
+            if node.is_end and distance <= max_distance:
+                matches.append((distance, -node.weight, path))
+            if min(row) <= max_distance or is_prefix and distance <= max_distance:
+                for child in node.get_children():
+                    stack.append((child, path + child.char, row, distance))
+        matches.sort()
+        return [(path, distance) for distance, _, path in matches]
 
     def chase(self, prefix):
         return self._chase(self.root, prefix)
@@ -112,9 +295,11 @@ class Trie(object):
     def _chase(cls, root: Node, prefix: str, index: int = 0):
         if root is None or prefix is None:
             return None
-        if len(prefix) == index:
-            return root
-        return cls._chase(root.get_child(prefix[index]), prefix, index + 1)
+        for i in range(index, len(prefix)):
+            root = root.children.get(prefix[i])
+            if root is None:
+                return None
+        return root
 
     def traverse(self, order: str):
         name = f'_traverse_{order}'
@@ -125,19 +310,165 @@ class Trie(object):
 
     @classmethod
     def _traverse_pre(cls, root: Node):
-        yield root
-        for child in root.get_children():
-            yield from cls._traverse_pre(child)
+        stack = [root]
+        while stack:
+            root = stack.pop()
+            yield root
+            stack.extend(reversed(root.children.values()))
 
     @classmethod
     def _traverse_post(cls, root: Node):
-        for child in root.get_children():
-            yield from cls._traverse_pre(child)
-        yield root
+        stack = [(root, False)]
+        while stack:
+            root, visited = stack.pop()
+            if visited:
+                yield root
+                continue
+            # the node comes back once its children are done
+            stack.append((root, True))
+            for child in reversed(root.children.values()):
+                stack.append((child, False))
 
     def __contains__(self, word)->bool:
-        if len(word) == 0 or word is None:
+        if word is None or len(word) == 0:
             return False
         return self._contains(self.root, word)
 
 
+class RadixTrie(object):
+    """Compressed (Patricia) trie, edges carry whole labels instead of single
+    chars so chains of single-child nodes collapse into one node"""
+    def __init__(self):
+        self.root = self.Node('')
+        self._count = 0
+
+    class Node(object):
+        __slots__ = ('label', 'children', 'is_end')
+
+        def __init__(self, label: str, is_end=False):
+            self.label = label
+            # keyed by the first char of the child label
+            self.children = {}
+            self.is_end = is_end
+
+        @property
+        def has_any(self):
+            return len(self.children) != 0
+
+        def get_children(self)->[]:
+            return self.children.values()
+
+        def __str__(self):
+            return f'<Node: {self.label}>'
+
+        def __repr__(self):
+            return str(self)
+
+    def insert(self, word: str):
+        if word is None or word == '':
+            return
+        node = self.root
+        i, n = 0, len(word)
+        while i < n:
+            child = node.children.get(word[i])
+            if child is None:
+                node.children[word[i]] = self.Node(word[i:], True)
+                self._count += 1
+                return
+            label = child.label
+            j, m = 1, min(len(label), n - i)
+            while j < m and label[j] == word[i + j]:
+                j += 1
+            if j < len(label):
+                # split the edge where the word leaves it
+                middle = self.Node(label[:j])
+                child.label = label[j:]
+                middle.children[child.label[0]] = child
+                node.children[word[i]] = middle
+                child = middle
+            node = child
+            i += j
+        if node is not self.root and not node.is_end:
+            node.is_end = True
+            self._count += 1
+
+    def remove(self, word: str):
+        if word is None or word == '':
+            return
+        parents = []
+        node = self.root
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None or not word.startswith(child.label, i):
+                return
+            parents.append(node)
+            node = child
+            i += len(child.label)
+        if not node.is_end:
+            return
+        node.is_end = False
+        self._count -= 1
+        parent = parents.pop()
+        if not node.has_any:
+            del parent.children[node.label[0]]
+            if not parents:
+                return
+            node, parent = parent, parents.pop()
+        # merge a pass-through node into its only child
+        if not node.is_end and len(node.children) == 1:
+            child, = node.children.values()
+            child.label = node.label + child.label
+            parent.children[child.label[0]] = child
+
+    def count_words(self)->int:
+        return self._count
+
+    def __contains__(self, word)->bool:
+        if word is None or len(word) == 0:
+            return False
+        node = self.root
+        i = 0
+        while i < len(word):
+            child = node.children.get(word[i])
+            if child is None or not word.startswith(child.label, i):
+                return False
+            node = child
+            i += len(child.label)
+        return node.is_end
+
+    def chase(self, prefix: str):
+        """Highest node whose path starts with prefix"""
+        node, _ = self._chase(prefix)
+        return node
+
+    def _chase(self, prefix: str)->(Node, str):
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if child is None:
+                return None, None
+            if prefix.startswith(child.label, i):
+                node = child
+                i += len(child.label)
+            elif child.label.startswith(prefix[i:]):
+                # the prefix ends inside this edge
+                return child, prefix[:i] + child.label
+            else:
+                return None, None
+        return node, prefix
+
+    def autocomplete(self, prefix: str)->[str]:
+        node, path = self._chase(prefix)
+        words = []
+        if node is None:
+            return words
+        stack = [(node, path)]
+        while stack:
+            node, path = stack.pop()
+            if node.is_end:
+                words.append(path)
+            for child in reversed(node.children.values()):
+                stack.append((child, path + child.label))
+        return words
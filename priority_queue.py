@@ -0,0 +1,137 @@
+import asyncio
+import collections
+import queue
+import threading
+
+from heap import Heap
+
+
+class HeapQueue(object):
+    """Bounded blocking priority queue on Heap, safe to share between threads.
+    Smallest item first unless is_max, like queue.PriorityQueue it raises
+    queue.Full and queue.Empty when it can not wait."""
+    def __init__(self, maxsize: int, is_max: bool = False):
+        if maxsize <= 0:
+            raise ValueError('maxsize must be positive')
+        self._heap = Heap(maxsize, is_max=is_max)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def put(self, item, block: bool = True, timeout: float = None):
+        with self._lock:
+            if not HeapQueue._wait(self._not_full, lambda: not self._heap.is_full, block, timeout):
+                raise queue.Full
+            self._heap.insert(item)
+            self._not_empty.notify()
+
+    def put_nowait(self, item):
+        self.put(item, False)
+
+    def get(self, block: bool = True, timeout: float = None):
+        with self._lock:
+            if not HeapQueue._wait(self._not_empty, lambda: not self._heap.is_empty, block, timeout):
+                raise queue.Empty
+            item = self._heap.remove()
+            self._not_full.notify()
+            return item
+
+    def get_nowait(self):
+        return self.get(False)
+
+    def get_many(self, max_items: int, block: bool = True, timeout: float = None)->list:
+        """Wait for one item, then take up to max_items in priority order with one wakeup"""
+        with self._lock:
+            if not HeapQueue._wait(self._not_empty, lambda: not self._heap.is_empty, block, timeout):
+                raise queue.Empty
+            items = self._heap.pop_many(max_items)
+            self._not_full.notify(len(items))
+            return items
+
+    @staticmethod
+    def _wait(condition: threading.Condition, predicate, block: bool, timeout: float)->bool:
+        if not block:
+            return predicate()
+        return condition.wait_for(predicate, timeout)
+
+    def qsize(self)->int:
+        return self._heap.size
+
+    def empty(self)->bool:
+        return self._heap.is_empty
+
+    def full(self)->bool:
+        return self._heap.is_full
+
+
+class AsyncHeapQueue(object):
+    """Bounded asyncio priority queue on Heap. put waits while the queue is full,
+    which gives producers backpressure, and get waits while it is empty."""
+    def __init__(self, maxsize: int, is_max: bool = False):
+        if maxsize <= 0:
+            raise ValueError('maxsize must be positive')
+        self._heap = Heap(maxsize, is_max=is_max)
+        self._getters = collections.deque()
+        self._putters = collections.deque()
+
+    async def put(self, item):
+        await self._wait(self._putters, lambda: self._heap.is_full)
+        self.put_nowait(item)
+
+    def put_nowait(self, item):
+        if self._heap.is_full:
+            raise asyncio.QueueFull
+        self._heap.insert(item)
+        AsyncHeapQueue._wakeup(self._getters, 1)
+
+    async def get(self):
+        await self._wait(self._getters, lambda: self._heap.is_empty)
+        return self.get_nowait()
+
+    def get_nowait(self):
+        if self._heap.is_empty:
+            raise asyncio.QueueEmpty
+        item = self._heap.remove()
+        AsyncHeapQueue._wakeup(self._putters, 1)
+        return item
+
+    async def get_many(self, max_items: int)->list:
+        """Wait for one item, then take up to max_items in priority order with one wakeup"""
+        await self._wait(self._getters, lambda: self._heap.is_empty)
+        items = self._heap.pop_many(max_items)
+        AsyncHeapQueue._wakeup(self._putters, len(items))
+        return items
+
+    async def _wait(self, waiters: collections.deque, blocked):
+        while blocked():
+            waiter = asyncio.get_running_loop().create_future()
+            waiters.append(waiter)
+            try:
+                await waiter
+            except BaseException:
+                waiter.cancel()
+                try:
+                    waiters.remove(waiter)
+                except ValueError:
+                    pass
+                # pass a wakeup this waiter received on to the next one
+                if not blocked() and not waiter.cancelled():
+                    AsyncHeapQueue._wakeup(waiters, 1)
+                raise
+
+    @staticmethod
+    def _wakeup(waiters: collections.deque, n: int):
+        while n and waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                n -= 1
+
+    def qsize(self)->int:
+        return self._heap.size
+
+    def empty(self)->bool:
+        return self._heap.is_empty
+
+    def full(self)->bool:
+        return self._heap.is_full
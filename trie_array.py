@@ -1,39 +1,256 @@
-class Trie(object):
+import array
+import string
+
+
+class Alphabet(object):
+    """Maps the symbols of words to child slots 0..size - 1 and back"""
+    def __init__(self, symbols: str):
+        self.symbols = symbols
+        self.size = len(symbols)
+        self._codes = {char: code for code, char in enumerate(symbols)}
+
+    def encode(self, word: str)->[int]:
+        codes = self._codes
+        try:
+            return [codes[char] for char in word]
+        except KeyError as e:
+            raise ValueError(f'Symbol `{e.args[0]}` is not in the alphabet') from None
 
+    def decode(self, codes)->str:
+        symbols = self.symbols
+        return ''.join([symbols[code] for code in codes])
+
+
+class Utf8Alphabet(Alphabet):
+    """Byte level alphabet, any str is stored as its utf-8 bytes"""
     def __init__(self):
-        self.root = self.Node(None)
+        super().__init__(''.join(map(chr, range(256))))
+
+    def encode(self, word: str)->bytes:
+        return word.encode('utf-8')
+
+    def decode(self, codes)->str:
+        return bytes(codes).decode('utf-8')
+
+
+LOWERCASE = Alphabet(string.ascii_lowercase)
+DIGITS = Alphabet(string.digits)
+LATIN1 = Alphabet(''.join(map(chr, range(256))))
+UTF8 = Utf8Alphabet()
+
+
+# widest alphabet that gets a dense child table, wider ones keep sorted sibling lists
+DENSE_SIZE = 64
+
+
+class Trie(object):
+    """Trie stored in flat arrays indexed by node id, node 0 is the root, 0
+    marks a missing child as the root is nobody's child. Narrow alphabets
+    give node n the child slots n * size .. n * size + size - 1 of one int
+    table. Wide ones (UTF8, LATIN1) would spend 1 KiB per node that way, so
+    each node keeps its first child and every node its next sibling and its
+    code instead, siblings sorted by code."""
+    def __init__(self, alphabet: Alphabet = LOWERCASE, dense: bool = None):
+        self.alphabet = alphabet
+        self._size = alphabet.size
+        self._dense = alphabet.size <= DENSE_SIZE if dense is None else dense
+        if self._dense:
+            self._empty = array.array('i', [0]) * alphabet.size
+            self._children = array.array('i')
+            self._get, self._link, self._unlink, self._edges = (
+                self._get_dense, self._link_dense, self._unlink_dense, self._edges_dense)
+        else:
+            self._first = array.array('i')
+            self._next = array.array('i')
+            self._codes = array.array('i')
+            self._get, self._link, self._unlink, self._edges = (
+                self._get_sparse, self._link_sparse, self._unlink_sparse, self._edges_sparse)
+        self._is_end = bytearray()
+        # words ending in the subtree of each node
+        self._counts = array.array('i')
+        # ids of pruned nodes, reused before the tables grow
+        self._free = []
+        self._new_node()
+
+    def _new_node(self)->int:
+        if self._free:
+            node = self._free.pop()
+            if self._dense:
+                start = node * self._size
+                self._children[start:start + self._size] = self._empty
+            else:
+                self._first[node] = 0
+            self._is_end[node] = 0
+            self._counts[node] = 0
+            return node
+        if self._dense:
+            self._children.extend(self._empty)
+        else:
+            self._first.append(0)
+            self._next.append(0)
+            self._codes.append(0)
+        self._is_end.append(0)
+        self._counts.append(0)
+        return len(self._is_end) - 1
+
+    def _get_dense(self, node: int, code: int)->int:
+        return self._children[node * self._size + code]
+
+    def _link_dense(self, node: int, code: int, child: int):
+        self._children[node * self._size + code] = child
 
-    class Node(object):
-        def __init__(self, char, is_end=False):
-            self.char = char
-            self.children = [None] * 26
-            self.is_end = is_end
+    def _unlink_dense(self, node: int, code: int):
+        self._children[node * self._size + code] = 0
 
-        def has_child(self, char: str) -> bool:
-            return self.children[ord(char) - ord('a')] is not None
+    def _edges_dense(self, node: int)->[(int, int)]:
+        start = node * self._size
+        row = self._children[start:start + self._size]
+        return [(code, child) for code, child in enumerate(row) if child]
 
-        def add_child(self, char: str):
-            self.children[ord(char) - ord('a')] = self.__class__(char)
+    def _get_sparse(self, node: int, code: int)->int:
+        codes, siblings = self._codes, self._next
+        child = self._first[node]
+        while child and codes[child] < code:
+            child = siblings[child]
+        return child if child and codes[child] == code else 0
 
-        def get_child(self, char: str):
-            return self.children[ord(char) - ord('a')]
+    def _link_sparse(self, node: int, code: int, child: int):
+        codes, siblings = self._codes, self._next
+        previous, current = 0, self._first[node]
+        while current and codes[current] < code:
+            previous, current = current, siblings[current]
+        codes[child] = code
+        siblings[child] = current
+        if previous:
+            siblings[previous] = child
+        else:
+            self._first[node] = child
 
-        def __str__(self):
-            return f'<Node: {self.char}>'
+    def _unlink_sparse(self, node: int, code: int):
+        codes, siblings = self._codes, self._next
+        previous, current = 0, self._first[node]
+        while codes[current] != code:
+            previous, current = current, siblings[current]
+        if previous:
+            siblings[previous] = siblings[current]
+        else:
+            self._first[node] = siblings[current]
 
-        def __repr__(self):
-            return str(self)
+    def _edges_sparse(self, node: int)->[(int, int)]:
+        codes, siblings = self._codes, self._next
+        edges = []
+        child = self._first[node]
+        while child:
+            edges.append((codes[child], child))
+            child = siblings[child]
+        return edges
 
     def insert(self, word):
-        Trie._insert(self.root, word)
-
-    @classmethod
-    def _insert(cls, root: Node, word: str):
-        char = word[0]
-        if not root.has_child(char):
-            root.add_child(char)
-        if len(word) == 1:
-            root.get_child(char).is_end = True
+        if word is None or word == '':
+            return
+        codes = self.alphabet.encode(word)
+        get, link = self._get, self._link
+        path = [0]
+        node = 0
+        for code in codes:
+            child = get(node, code)
+            if child == 0:
+                child = self._new_node()
+                link(node, code, child)
+            node = child
+            path.append(node)
+        if not self._is_end[node]:
+            self._is_end[node] = 1
+            counts = self._counts
+            for node in path:
+                counts[node] += 1
+
+    def remove(self, word):
+        if word is None or word == '':
+            return
+        try:
+            codes = self.alphabet.encode(word)
+        except ValueError:
             return
-        cls._insert(root.get_child(char), word[1:])
+        get = self._get
+        path = [0]
+        for code in codes:
+            node = get(path[-1], code)
+            if node == 0:
+                return
+            path.append(node)
+        if not self._is_end[path[-1]]:
+            return
+        self._is_end[path[-1]] = 0
+        counts = self._counts
+        for node in path:
+            counts[node] -= 1
+        # prune the nodes left without words, bottom up
+        for depth in range(len(codes), 0, -1):
+            node = path[depth]
+            if counts[node]:
+                break
+            self._unlink(path[depth - 1], codes[depth - 1])
+            self._free.append(node)
+
+    def _walk(self, codes)->int:
+        # the hot path of every lookup, so _get is inlined for both layouts
+        node = 0
+        if self._dense:
+            children, size = self._children, self._size
+            for code in codes:
+                node = children[node * size + code]
+                if node == 0:
+                    return None
+            return node
+        first, siblings, node_codes = self._first, self._next, self._codes
+        for code in codes:
+            child = first[node]
+            while child and node_codes[child] < code:
+                child = siblings[child]
+            if not child or node_codes[child] != code:
+                return None
+            node = child
+        return node
+
+    def chase(self, prefix: str)->int:
+        """Id of the node reached by prefix, None if no word starts with it"""
+        if prefix is None:
+            return None
+        try:
+            return self._walk(self.alphabet.encode(prefix))
+        except ValueError:
+            return None
+
+    def autocomplete(self, prefix: str)->[str]:
+        node = self.chase(prefix)
+        words = []
+        if node is None:
+            return words
+        edges, is_end = self._edges, self._is_end
+        decode = self.alphabet.decode
+        stack = [(node, ())]
+        while stack:
+            node, suffix = stack.pop()
+            if is_end[node]:
+                words.append(prefix + decode(suffix))
+            for code, child in reversed(edges(node)):
+                stack.append((child, suffix + (code,)))
+        return words
+
+    def count_words(self)->int:
+        return self._counts[0]
+
+    def count_prefix(self, prefix: str)->int:
+        """Number of words starting with prefix"""
+        node = self.chase(prefix)
+        return 0 if node is None else self._counts[node]
+
+    def __contains__(self, word)->bool:
+        if word is None or len(word) == 0:
+            return False
+        node = self.chase(word)
+        return node is not None and self._is_end[node] == 1
 
+    def __iter__(self):
+        return iter(self.autocomplete(''))